@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Largest Files Finder — suorituskykymittaus.
+
+Rakentaa synteettisen puun (muoto, tiedostomäärä, poissuljetut alipuut, kovalinkit) ja mittaa skannausputken
+vaiheet erikseen: läpikäynti, stat, suodatus, luokittelu, kooste ja näkymämalli, sekä koko scan_files-ajon.
+Jokaisesta vaiheesta raportoidaan kesto, tiedostoa/s, järjestelmäkutsut (WalkStats) ja Python-varausten huippu
+(tracemalloc, omalla kierroksellaan); prosessin huippumuisti (RSS) raportoidaan koko ajolle.
+Käynnistysvaiheet ajetaan tuoreessa tulkissa: finder_coren tuonti ja aika ensimmäiseen scan_files-osumaan;
+--import-budget-ms / --first-result-budget-ms tekevät niistä rajat (poistumiskoodi 1, jos raja ylittyy).
+Lopuksi tarkistetaan sisäkkäiset juuret (nested_roots): eroavat kansiosummat antavat myös poistumiskoodin 1.
+Tulos kirjoitetaan JSONina, ja --compare vertaa sitä aiempaan ajoon.
+
+Esim.:
+    python finder_bench.py --shape wide --files 1000000 --dir /tmp/lff-bench --out uusi.json --compare vanha.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from finder_core import (DEFAULT_WORKERS, STATUS_META, DirRollup, FileInfo, ResultStore, ResultView, TopN, WalkStats,
+                         _stat_cost, classify_path, ext_matches, get_created_ts, human_size, in_date_range, iter_tree,
+                         iter_tree_parallel, parse_exts, parse_size, scan_files, scan_roots)
+
+# breadth = juuren alikansiot, depth = tasoja niiden alla, fanout = alikansioita per taso
+SHAPES={
+    'wide':dict(breadth=400,depth=0,fanout=0),
+    'deep':dict(breadth=4,depth=48,fanout=1),
+    'balanced':dict(breadth=8,depth=3,fanout=6),
+}
+SUBDIR_NAMES=('src','build','target','cache','docs','deps','assets','node_modules')
+EXTS=('.log','.mp4','.zip','.o','.txt','.rlib','.json','.png','.mov','.d')
+MANIFEST='.bench-tree.json'  # piilotiedosto: läpikäynti ohittaa sen oletuksena
+
+def peak_rss_kb()->Optional[int]:
+    try: import resource
+    except ImportError: return None  # Windows
+    r=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r//1024 if sys.platform=='darwin' else r  # macOS ilmoittaa tavuina, Linux kilotavuina
+
+# ---- synteettinen puu ----
+
+def _make_dirs(root:str, breadth:int, depth:int, fanout:int, excluded:float)->Tuple[List[str],List[str]]:
+    dirs:List[str]=[]; skipped:List[str]=[]
+    n_skip=round(breadth*excluded)
+    for b in range(breadth):
+        top=os.path.join(root,f'skip{b:03d}' if b<n_skip else f'proj{b:03d}')
+        (skipped if b<n_skip else dirs).append(top)
+        level=[top]
+        for _ in range(depth):
+            nxt=[]
+            for d in level:
+                for j in range(fanout):
+                    nxt.append(os.path.join(d,SUBDIR_NAMES[j%len(SUBDIR_NAMES)]+(str(j//len(SUBDIR_NAMES)) if j>=len(SUBDIR_NAMES) else '')))
+            (skipped if b<n_skip else dirs).extend(nxt); level=nxt
+    return dirs, skipped
+
+def build_tree(root:str, shape:str, files:int, excluded:float=0.0, hardlinks:float=0.0, seed:int=1)->Dict:
+    # Tiedostot ovat harvoja (truncate), joten kokojakauma ei vie levytilaa. Tiedostot jaetaan kansioihin
+    # tasaisesti; poissuljetut alipuut saavat saman osuuden tiedostoista kuin muutkin.
+    params=dict(shape=shape,files=files,excluded=excluded,hardlinks=hardlinks,seed=seed)
+    mpath=os.path.join(root,MANIFEST)
+    try:
+        with open(mpath,encoding='utf-8') as f: old=json.load(f)
+        if old.get('params')==params: return old
+    except (OSError,ValueError):
+        pass
+    if os.path.isdir(root):
+        for name in os.listdir(root):
+            p=os.path.join(root,name)
+            if name!=MANIFEST and not name.startswith(('proj','skip')): continue  # vain itse rakennettu poistetaan
+            if os.path.isdir(p): shutil.rmtree(p)
+            else: os.remove(p)
+    rng=random.Random(seed); t0=time.perf_counter()
+    dirs,skipped=_make_dirs(root, excluded=excluded, **SHAPES[shape])
+    all_dirs=dirs+skipped
+    for d in all_dirs: os.makedirs(d,exist_ok=True)
+    n_links=0; prev=None
+    for i in range(files):
+        p=os.path.join(all_dirs[i%len(all_dirs)],f'f{i:07d}{EXTS[i%len(EXTS)]}')
+        if prev is not None and hardlinks and rng.random()<hardlinks:
+            try: os.link(prev,p); n_links+=1; continue
+            except OSError: pass
+        with open(p,'wb') as f: f.truncate(min(int(rng.paretovariate(1.1)*2048),1<<34))
+        prev=p
+    info=dict(params=params,dirs=len(all_dirs),excluded_dirs=len(skipped),hardlinks=n_links,
+              exclude=[d for d in skipped if os.path.dirname(d)==root],build_s=round(time.perf_counter()-t0,3))
+    with open(mpath,'w',encoding='utf-8') as f: json.dump(info,f)
+    return info
+
+# ---- vaiheet ----
+
+def _timed(fn:Callable[[],Tuple[int,Dict]])->Tuple[float,int,Dict]:
+    t0=time.perf_counter(); n,extra=fn(); return time.perf_counter()-t0,n,extra
+
+def run_bench(root:str, exclude:List[str], exts:Optional[List[str]]=None, min_size:int=0, top_n:int=200,
+              workers:int=DEFAULT_WORKERS, repeat:int=3)->Dict[str,Dict]:
+    # Jokainen kierros käy puun läpi alusta, jotta stat-vaihe ei saa DirEntryn välimuistista ilmaisia tuloksia.
+    # Vaiheen tulos on nopein kierros. Muisti mitataan omalla, ajastamattomalla lisäkierroksella tracemallocilla
+    # (hidastaisi ajastettuja kierroksia): py_peak_kb = vaiheen aikainen Python-varausten huippu vaiheen alun yli.
+    import tracemalloc
+    stop=threading.Event(); best:Dict[str,Dict]={}; rounds=max(1,repeat)
+    def measure(name:str, fn:Callable[[],Tuple[int,Dict]]):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak(); base=tracemalloc.get_traced_memory()[0]; fn()
+            best[name]['py_peak_kb']=max(0,tracemalloc.get_traced_memory()[1]-base)//1024
+            return
+        dt,n,extra=_timed(fn); cur=best.get(name)
+        if cur is None or dt<cur['seconds']:
+            best[name]=dict(seconds=round(dt,4),items=n,per_s=round(n/dt) if dt>0 else None,**extra)
+    for rnd in range(rounds+1):
+        if rnd==rounds: tracemalloc.start()
+        ws=WalkStats(); entries:List[os.DirEntry]=[]
+        def walk():
+            entries.extend(iter_tree(root,False,True,[],True,None,stop,exclude,ws,lambda name:False))
+            return len(entries),ws.as_dict()
+        measure('walk',walk)
+        if workers>1:
+            pws=WalkStats()
+            def walk_parallel():
+                n=sum(1 for _ in iter_tree_parallel(root,False,True,[],True,None,stop,exclude,workers,pws,lambda name:False))
+                return n,dict(pws.as_dict(),workers=workers)
+            measure('walk_parallel',walk_parallel)
+        recs:List[tuple]=[]
+        def stat():
+            calls=0
+            for e in entries:
+                try: st=e.stat(follow_symlinks=False)
+                except OSError: continue
+                calls+=_stat_cost(e,False)
+                recs.append((e.path,st.st_size,get_created_ts(st),st.st_dev,st.st_ino,st.st_nlink))
+            return len(entries),dict(stat_calls=calls,syscalls=calls)
+        measure('stat',stat)
+        passed:List[tuple]=[]
+        def filt():
+            passed.extend(r for r in recs if ext_matches(r[0],exts) and r[1]>=min_size and in_date_range(r[2],None,None))
+            return len(recs),dict(passed=len(passed))
+        measure('filter',filt)
+        classified:List[FileInfo]=[]
+        def classify():
+            for path,size,cts,dev,ino,_ in passed:
+                status,reason=classify_path(path)
+                classified.append(FileInfo(path=path,size=size,created_ts=cts,status=status,reason=reason,dev=dev,ino=ino))
+            return len(passed),{}
+        measure('classify',classify)
+        def aggregate():
+            # Kovalinkkien karsinta, kansiokooste ja Top N kuten scan_filesissa ja käyttöliittymässä
+            rollup=DirRollup([root]); top=TopN(top_n); seen=set()
+            for fi,r in zip(classified,passed):
+                if r[5]>1:
+                    if (fi.dev,fi.ino) in seen: continue
+                    seen.add((fi.dev,fi.ino))
+                rollup.add(os.path.abspath(fi.path),fi.size); top.add(fi)
+            top.items(); top_dirs=rollup.top(20)
+            return len(classified),dict(top_dirs=len(top_dirs),dropped=top.dropped_count)
+        measure('aggregate',aggregate)
+        def render_model():
+            # Käyttöliittymän drain_live + lajittelu/suodatus + yhden näkymäsivun muotoilu ilman tkinteriä
+            store=ResultStore(); view=ResultView(store); top=TopN(top_n)
+            for fi in classified:
+                if not top.accepts(fi.size): top.drop(fi.size); continue
+                rid=store.add(fi); _,ev=top.push_sized(fi.size,rid)
+                if ev is not None: view.remove(ev); store.remove(ev)
+                view.add(rid)
+            for col,desc in (('name',False),('dir',False),('created',True),('size',True)): view.set_sort(col,desc)
+            view.set_visible({'safe','caution'}); view.set_visible(set(STATUS_META))
+            page=[(STATUS_META[f.status]['label'],f.basename,f.dirname,human_size(f.size),f.created_str)
+                  for f in (view[i] for i in range(min(60,len(view))))]
+            return len(classified),dict(rows=len(view),page=len(page))
+        measure('render_model',render_model)
+        entries.clear(); recs.clear(); passed.clear(); classified.clear()
+        for name,w in (('scan_files',1),('scan_files_parallel',workers)):
+            if w<=1 and name!='scan_files': continue
+            sws=WalkStats()
+            def scan():
+                n=sum(1 for _ in scan_files(root,exts,min_size,False,True,[],True,None,None,stop,
+                                             exclude_substrings=exclude,workers=w,walk_stats=sws))
+                return sws.entries,dict(sws.as_dict(),results=n,workers=w)
+            measure(name,scan)
+    tracemalloc.stop()
+    return best
+
+# Ajetaan lapsiprosessissa, jotta tuonnit ovat kylmiä; tulostaa JSONin: tuonti ja ensimmäinen osuma sekunteina
+_STARTUP_PROBE='''
+import json,sys,threading,time
+t0=time.perf_counter()
+from finder_core import scan_files
+t1=time.perf_counter()
+root,exclude,exts,min_size,workers=json.loads(sys.argv[1])
+it=scan_files(root,exts,min_size,False,True,[],True,None,None,threading.Event(),exclude_substrings=exclude,workers=workers)
+first=next(it,None); t2=time.perf_counter()
+print(json.dumps(dict(import_core=t1-t0,first_result=t2-t1,found=first is not None,modules=len(sys.modules))))
+'''
+
+def run_startup(root:str, exclude:List[str], exts:Optional[List[str]]=None, min_size:int=0,
+                workers:int=DEFAULT_WORKERS, repeat:int=3)->Dict[str,Dict]:
+    here=os.path.dirname(os.path.abspath(__file__)); best:Dict[str,Dict]={}
+    for _ in range(max(1,repeat)):
+        out=subprocess.run([sys.executable,'-c',_STARTUP_PROBE,json.dumps([root,exclude,exts,min_size,workers])],
+                           cwd=here,capture_output=True,text=True,check=True).stdout
+        r=json.loads(out)
+        for name in ('import_core','first_result'):
+            if name not in best or r[name]<best[name]['seconds']:
+                best[name]=dict(seconds=round(r[name],4),items=1 if name=='import_core' else int(r['found']),per_s=None,modules=r['modules'])
+    return best
+
+def over_budget(stages:Dict[str,Dict], budgets:Dict[str,Optional[float]])->List[str]:
+    return [f'{name}: {stages[name]["seconds"]*1000:.0f} ms > raja {ms:.0f} ms' for name,ms in budgets.items()
+            if ms is not None and name in stages and stages[name]['seconds']*1000>ms]
+
+def check_nested_roots(root:str, exclude:List[str])->Dict[str,Dict]:
+    # Regressiotarkistus: juuri + sen alikansio juurena (scan_roots) antaa samat osumat ja kansiosummat kuin pelkkä
+    # juuri (scan_files); sisäkkäinen juuri ei saa katkaista summien nostoa ulompaan juureen. Yksi läpikäyntisäie,
+    # jotta kovalinkeistä lasketaan molemmissa sama polku.
+    sub=next((e.path for e in sorted(os.scandir(root),key=lambda e:e.name)
+              if e.is_dir() and not e.name.startswith('.') and e.path not in exclude),root)
+    stop=threading.Event(); one=DirRollup([root]); many=DirRollup([root,sub])
+    def scan():
+        n=sum(1 for _ in scan_roots([root,sub],None,0,False,True,[],True,None,None,stop,exclude_substrings=exclude,
+                                    rollup=many))
+        return n,{}
+    dt,n,_=_timed(scan)
+    m=sum(1 for _ in scan_files(root,None,0,False,True,[],True,None,None,stop,exclude_substrings=exclude,rollup=one))
+    return {'nested_roots':dict(seconds=round(dt,4),items=n,per_s=round(n/dt) if dt>0 else None,
+                                ok=n==m and many.totals()==one.totals(),nested=sub)}
+
+def compare(new:Dict, old:Dict)->List[str]:
+    lines=[]
+    for name,st in new['stages'].items():
+        o=old.get('stages',{}).get(name)
+        if not o or not o.get('seconds'): lines.append(f'{name:22s} {st["seconds"]:9.4f}s  (uusi)'); continue
+        ratio=st['seconds']/o['seconds']
+        lines.append(f'{name:22s} {o["seconds"]:9.4f}s -> {st["seconds"]:9.4f}s  x{ratio:.2f}'+('  HIDASTUI' if ratio>1.1 else ''))
+    return lines
+
+def build_parser()->argparse.ArgumentParser:
+    ap=argparse.ArgumentParser(prog='finder-bench',description='Mittaa skannausputken vaiheet synteettisellä puulla.')
+    ap.add_argument('--shape',choices=sorted(SHAPES),default='balanced')
+    ap.add_argument('--files',type=int,default=50000,help='tiedostoja puussa (oletus 50000)')
+    ap.add_argument('--excluded',type=float,default=0.25,help='poissuljettujen alipuiden osuus (oletus 0.25)')
+    ap.add_argument('--hardlinks',type=float,default=0.05,help='kovalinkkien osuus tiedostoista (oletus 0.05)')
+    ap.add_argument('--seed',type=int,default=1)
+    ap.add_argument('--dir',default=None,help='puun kansio; samoilla parametreilla olemassa oleva puu käytetään uudelleen')
+    ap.add_argument('--ext',action='append',default=[],help='päätesuodatin kuten finder_cli.py:ssä')
+    ap.add_argument('--min-size',type=parse_size,default=0)
+    ap.add_argument('--top-n',type=int,default=200)
+    ap.add_argument('--workers',type=int,default=DEFAULT_WORKERS)
+    ap.add_argument('--repeat',type=int,default=3,help='kierroksia; kustakin vaiheesta raportoidaan nopein')
+    ap.add_argument('--import-budget-ms',type=float,default=None,help='raja finder_coren tuonnille kylmässä tulkissa')
+    ap.add_argument('--first-result-budget-ms',type=float,default=None,help='raja ajalle ensimmäiseen osumaan')
+    ap.add_argument('--out',default=None,help='JSON-tulos tiedostoon (oletus: stdout)')
+    ap.add_argument('--compare',default=None,help='aiempi JSON-tulos, johon verrataan (stderriin)')
+    return ap
+
+def main(argv:Optional[List[str]]=None)->int:
+    args=build_parser().parse_args(argv)
+    tmp=None if args.dir else tempfile.mkdtemp(prefix='lff-bench-')
+    root=args.dir or tmp
+    os.makedirs(root,exist_ok=True)
+    try:
+        tree=build_tree(root,args.shape,args.files,args.excluded,args.hardlinks,args.seed)
+        exts=parse_exts(args.ext)
+        stages=run_startup(root,tree['exclude'],exts,args.min_size,max(1,args.workers),args.repeat)
+        stages.update(run_bench(root,tree['exclude'],exts,args.min_size,args.top_n,max(1,args.workers),args.repeat))
+        stages.update(check_nested_roots(root,tree['exclude']))
+    finally:
+        if tmp: shutil.rmtree(tmp,ignore_errors=True)
+    result=dict(created=time.strftime('%Y-%m-%dT%H:%M:%S'),python=platform.python_version(),platform=platform.platform(),
+                cpu_count=os.cpu_count(),tree=tree,stages=stages,rss_peak_kb=peak_rss_kb())
+    text=json.dumps(result,indent=2,ensure_ascii=False)
+    if args.out:
+        with open(args.out,'w',encoding='utf-8') as f: f.write(text+'\n')
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare,encoding='utf-8') as f: old=json.load(f)
+        print('\n'.join(compare(result,old)),file=sys.stderr)
+    over=over_budget(stages,{'import_core':args.import_budget_ms,'first_result':args.first_result_budget_ms})
+    if not stages['nested_roots']['ok']: over.append(f'nested_roots: kansiosummat eroavat ({stages["nested_roots"]["nested"]})')
+    if over:
+        print('Yli rajan: '+'; '.join(over),file=sys.stderr); return 1
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Largest Files Finder — komentorivikäyttö ilman graafista käyttöliittymää.
+
+Esim. cron-ajo palvelimella:
+    python finder_cli.py / --min-size 500M --ext iso,zip --exclude /proc --format jsonl
+    python finder_cli.py /Volumes/Data ~/Projects --top-n 50   # useampi juuri rinnakkain
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+from typing import Dict, List, Optional
+
+from finder_core import (DEFAULT_WORKERS, DirRollup, RootProgress, WalkStats, default_root, find_duplicates, find_files,
+                         parse_exts, parse_size)
+
+PROG='largest-files-finder'
+
+FIELDS=('path','size','created_ts','status','reason')
+DIR_FIELDS=('path','size','files')
+DUP_FIELDS=('size','wasted','count','paths')
+DUP_CSV_FIELDS=('group','size','wasted','count','path')  # CSV: rivi per polku, ryhmät tunnisteella
+
+def build_parser()->argparse.ArgumentParser:
+    ap=argparse.ArgumentParser(prog=PROG,description='Etsii suurimmat tiedostot ja tulostaa ne JSON-riveinä tai CSV:nä.')
+    ap.add_argument('roots',nargs='*',metavar='root',help='juurikansiot; useampi juuri skannataan rinnakkain (oletus: koko kone)')
+    ap.add_argument('--top-n',type=int,default=None,help='vain N suurinta (tulostetaan skannauksen lopuksi); oletus: kaikki osumat heti')
+    ap.add_argument('--min-size',type=parse_size,default=0,help='minimikoko, esim. 500K, 50M, 1.5G (oletus 0)')
+    ap.add_argument('--ext',action='append',default=[],help='tiedostopäätteet pilkuin, voi toistaa (esim. --ext mov,mp4)')
+    ap.add_argument('--exclude',action='append',default=[],help='poissuljettava polku tai osamerkkijono, voi toistaa')
+    ap.add_argument('--dirs',action='store_true',help='tulosta tiedostojen sijaan suurimmat kansiot (du kaikista tiedostoista, --ext/--min-size ei rajaa); oletuksena 20')
+    ap.add_argument('--duplicates',action='store_true',help='tulosta sisällöltään identtisten tiedostojen ryhmät (hukkatilan mukaan; CSV:nä rivi per polku)')
+    ap.add_argument('--stats',action='store_true',help='tulosta läpikäynnin telemetria (laskurit, nopeudet, virheet, hitaimmat kansiot) stderriin JSONina')
+    ap.add_argument('--dir-timeout',type=float,default=None,help='ohita kansio, jonka listaus kestää yli N sekuntia (esim. jumittunut verkkolevy)')
+    ap.add_argument('--format',choices=('jsonl','csv'),default='jsonl')
+    ap.add_argument('--workers',type=int,default=DEFAULT_WORKERS,help=f'läpikäyntisäikeet (oletus {DEFAULT_WORKERS})')
+    ap.add_argument('--include-hidden',action='store_true',help='käy läpi myös piilotetut tiedostot ja kansiot')
+    ap.add_argument('--follow-symlinks',action='store_true')
+    ap.add_argument('--cross-fs',action='store_true',help='salli siirtyminen toiselle tiedostojärjestelmälle')
+    return ap
+
+def main(argv:Optional[List[str]]=None)->int:
+    args=build_parser().parse_args(argv)
+    exclude=[x.strip() for v in args.exclude for x in v.split(',') if x.strip()]
+    roots=args.roots or [default_root()]
+    # Puuttuva juuri ei saa näyttää tyhjältä levyltä (esim. cron-ajossa): ilmoitetaan ja poistutaan lopuksi koodilla 1
+    missing=[r for r in roots if not os.path.isdir(r)]
+    for r in missing: print(f'{PROG}: ohitetaan {r}: ei löydy tai ei ole kansio',file=sys.stderr)
+    roots=[r for r in roots if r not in missing]
+    if not roots: return 2
+    stop_flag=threading.Event(); out=sys.stdout
+    fields=(DUP_CSV_FIELDS if args.format=='csv' else DUP_FIELDS) if args.duplicates else DIR_FIELDS if args.dirs else FIELDS
+    if args.format=='csv':
+        w=csv.writer(out); w.writerow(fields)
+        def emit(x): w.writerow([getattr(x,k) if hasattr(x,k) else x[k] for k in fields])
+    else:
+        def emit(x): out.write(json.dumps({k:getattr(x,k) if hasattr(x,k) else x[k] for k in fields},ensure_ascii=False)+'\n')
+    rollup=DirRollup(roots) if args.dirs else None; walk_stats=WalkStats(); progress:Dict[str,RootProgress]={}
+    try:
+        files=find_files(roots[0] if len(roots)==1 else roots, parse_exts(args.ext), args.min_size, exclude, None if args.dirs or args.duplicates else args.top_n,
+                         args.follow_symlinks, not args.include_hidden, not args.cross_fs, workers=max(1,args.workers),
+                         stop_flag=stop_flag, rollup=rollup, walk_stats=walk_stats, dir_timeout=args.dir_timeout,
+                         progress=progress)
+        if args.duplicates:
+            groups=find_duplicates(files, workers=max(1,args.workers), min_size=max(1,args.min_size), stop_flag=stop_flag)
+            for i,g in enumerate(groups[:args.top_n] if args.top_n else groups,1):
+                row={'group':i,'size':g[0].size,'wasted':g[0].size*(len(g)-1),'count':len(g)}
+                if args.format=='csv':
+                    for fi in g: emit(dict(row,path=fi.path))
+                else:
+                    emit(dict(row,paths=[fi.path for fi in g]))
+            out.flush()
+        elif rollup is not None:
+            for _ in files: pass
+            for dt in rollup.top(args.top_n or 20): emit(dt)
+            out.flush()
+        else:
+            for fi in files: emit(fi); out.flush()
+        if args.stats: print(json.dumps(walk_stats.snapshot(),ensure_ascii=False),file=sys.stderr)
+    except KeyboardInterrupt:
+        stop_flag.set(); return 130
+    except BrokenPipeError:
+        # esim. `| head`: lopetetaan hiljaa
+        stop_flag.set()
+        os.dup2(os.open(os.devnull,os.O_WRONLY),sys.stdout.fileno())
+        return 0
+    failed=[p for p in progress.values() if p.state=='virhe']
+    for p in failed: print(f'{PROG}: juuren {p.root} skannaus epäonnistui: {p.note}',file=sys.stderr)
+    return 1 if missing or failed else 0
+
+if __name__=='__main__':
+    sys.exit(main())
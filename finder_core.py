@@ -0,0 +1,1274 @@
+# -*- coding: utf-8 -*-
+"""
+Largest Files Finder — skannausydin ilman käyttöliittymää.
+
+Läpikäynti (iter_tree*), suodatus ja luokittelu (scan_files, classify_path), Top N -kooste,
+pysyvä indeksi ja näkymämalli. Ei riipu tkinteristä, joten moduulia voi käyttää myös
+palvelimilla (ks. finder_cli.py).
+"""
+
+import os
+import sys
+import threading
+import queue
+import time
+import heapq
+import bisect
+import re
+import itertools
+import functools
+from array import array
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional, Iterable, Tuple, Callable, Set, Dict, Union
+
+# Käynnistysaika: json, hashlib, sqlite3, datetime ja concurrent.futures ladataan vasta niitä käyttävissä
+# funktioissa (indeksi, kaksoiskappaleet, päiväysmuotoilu), eivät skannauksen alkuun tarvittaessa.
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+SAFE='safe'; CAUTION='caution'; SYSTEM='system'
+STATUS_META={SAFE:{'label':'🟢 Turvallinen','dot':'●','color':'#2ecc71'},CAUTION:{'label':'🟡 Harkittava','dot':'●','color':'#f1c40f'},SYSTEM:{'label':'🔴 Järjestelmä','dot':'●','color':'#e74c3c'}}
+STATUS_ORDER={SAFE:0,CAUTION:1,SYSTEM:2}
+SYSTEM_ROOT_PREFIXES=['/System','/Library','/usr','/bin','/sbin','/private','/opt','/Applications']
+SAFE_PATTERNS=['/target/','/deps/','/incremental/','/build/','.rlib','.rmeta','.d',
+               os.path.expanduser('~/.npm'),os.path.expanduser('~/.cache/yarn'),os.path.expanduser('~/.cache/pnpm'),
+               os.path.expanduser('~/.cargo/registry'),os.path.expanduser('~/.cargo/git'),
+               os.path.expanduser('~/Library/Developer/Xcode/DerivedData'),
+               os.path.expanduser('~/Library/Developer/CoreSimulator'),
+               os.path.expanduser('~/Library/Caches')]
+
+@dataclass(slots=True)
+class FileInfo:
+    path: str
+    size: int
+    created_ts: float
+    status: str = field(default='', compare=False)
+    reason: str = field(default='', compare=False, repr=False)
+    dev: int = field(default=0, compare=False, repr=False)
+    ino: int = field(default=0, compare=False, repr=False)
+    def __post_init__(self):
+        # Luokitellaan kerran luonnin yhteydessä, ei jokaisella piirrolla
+        if not self.status: self.status,self.reason=classify_path(self.path)
+    @property
+    def dirname(self)->str: return os.path.dirname(self.path)
+    @property
+    def basename(self)->str: return os.path.basename(self.path)
+    @property
+    def created_str(self)->str:
+        from datetime import datetime
+        try: return datetime.fromtimestamp(self.created_ts).strftime('%Y-%m-%d %H:%M')
+        except Exception: return '-'
+
+def human_size(n:int)->str:
+    if n<0: return '-'
+    units=["B","KB","MB","GB","TB","PB"]; i=0; f=float(n)
+    while f>=1024.0 and i<len(units)-1:
+        f/=1024.0; i+=1
+    return f"{int(round(f))} {units[i]}" if i<=1 else f"{f:.2f} {units[i]}"
+
+def get_created_ts(st)->float:
+    ts=getattr(st,'st_birthtime',None)
+    if ts is None: ts=st.st_ctime
+    return float(ts)
+
+def ext_matches(path:str,allowed_exts:Optional[List[str]])->bool:
+    if not allowed_exts: return True
+    return os.path.splitext(path)[1].lower() in allowed_exts
+
+def in_date_range(ts:float,start_ts:Optional[float],end_ts:Optional[float])->bool:
+    if start_ts is not None and ts<start_ts: return False
+    if end_ts is not None and ts>end_ts: return False
+    return True
+
+class ExcludeMatcher:
+    # "Poissulje polut" käännettynä kerran skannausta kohden: '/'- ja '~'-alkuiset prefiksipuuhun,
+    # muut osamerkkijonot yhteen regexiin. Osumasäännöt samat kuin is_excluded_path:ssa.
+    def __init__(self, exclude_substrings:Iterable[str]):
+        self._trie=_PrefixTrie(); self._has_prefix=False; subs:List[str]=[]
+        for sub in exclude_substrings:
+            sub=sub.strip()
+            if not sub: continue
+            if sub.startswith('/') or sub.startswith('~'):
+                self._trie.add(os.path.abspath(os.path.expanduser(sub)),sub); self._has_prefix=True
+            else:
+                subs.append(sub)
+        self._sub_re=re.compile('|'.join(re.escape(x) for x in subs)) if subs else None
+        self._max_sub=max((len(x) for x in subs),default=0)
+    @classmethod
+    def compile(cls, exclude_substrings:Optional[Iterable[str]])->Optional['ExcludeMatcher']:
+        # None, jos poissulkuja ei ole: läpikäynti voi silloin ohittaa tarkistukset kokonaan
+        m=cls(exclude_substrings or [])
+        return m if m._has_prefix or m._sub_re is not None else None
+    def match(self, apath:str)->bool:
+        if self._has_prefix and next(self._trie.matches(apath),None) is not None: return True
+        return self._sub_re is not None and self._sub_re.search(apath) is not None
+    def prefix_below(self, adir:str)->bool:
+        # Voiko jokin prefiksi osua kansion adir sisältöön? Jos ei, sen tiedostoille ei tarvita prefiksitarkistusta.
+        return self._has_prefix and self._trie.has_path(adir if adir.endswith(os.sep) else adir+os.sep)
+    def entry_excluded(self, afull:str, dir_len:int, check_prefix:bool)->bool:
+        # Kansio itse on jo todettu ei-poissuljetuksi, joten osamerkkijonoa etsitään vain
+        # kohdista, joissa osuma ulottuu nimen puolelle.
+        if check_prefix and next(self._trie.matches(afull),None) is not None: return True
+        return self._sub_re is not None and self._sub_re.search(afull,max(0,dir_len-self._max_sub+1)) is not None
+
+@functools.lru_cache(maxsize=32)
+def _exclude_matcher(excludes:Tuple[str,...])->Optional[ExcludeMatcher]:
+    return ExcludeMatcher.compile(excludes)
+
+def is_excluded_path(path:str, exclude_substrings:List[str])->bool:
+    m=_exclude_matcher(tuple(exclude_substrings))
+    return m is not None and m.match(os.path.abspath(path))
+
+SLOW_DIRS=10
+
+class WalkStats:
+    # Läpikäynnin laskurit ja telemetria. Säikeet lisäävät summat lukon alla (add, record_dir, ...), joten
+    # rinnakkainen läpikäynti ei hukkaa laskuja. syscalls = scandir- + stat-kutsut. parent: kaikki päivitykset
+    # välitetään myös sille (monijuurisessa skannauksessa juurikohtaiset laskurit + yhteissumma); parentin
+    # queue_depth on lasten jonojen summa. Lukijat (UI, snapshot) näkevät korkeintaan hetken vanhan arvon.
+    def __init__(self, slow_dirs:int=SLOW_DIRS, parent:Optional['WalkStats']=None):
+        self._lock=threading.Lock(); self.started=time.perf_counter(); self.parent=parent
+        self.dirs=0; self.entries=0; self.files=0; self.scandir_calls=0; self.stat_calls=0
+        self.errors:Dict[str,int]={}; self.timed_out:List[str]=[]
+        self._slow:List[Tuple[float,str]]=[]; self._slow_n=slow_dirs
+        self.queue_depth=0; self.max_queue_depth=0
+        self.bytes_seen=0
+    def add(self, dirs:int=0, entries:int=0, scandir_calls:int=0, stat_calls:int=0, files:int=0, bytes_seen:int=0):
+        with self._lock:
+            self.dirs+=dirs; self.entries+=entries; self.scandir_calls+=scandir_calls; self.stat_calls+=stat_calls; self.files+=files
+            self.bytes_seen+=bytes_seen
+        if self.parent is not None: self.parent.add(dirs,entries,scandir_calls,stat_calls,files,bytes_seen)
+    def record_dir(self, d:str, seconds:float, entries:int, files:int, stat_calls:int, errors:Optional[Dict[str,int]]=None):
+        # Yksi listattu kansio: laskurit, virheet tyypeittäin ja hitaimmat kansiot (min-keko listauksen keston mukaan)
+        with self._lock:
+            self.dirs+=1; self.entries+=entries; self.files+=files; self.scandir_calls+=1; self.stat_calls+=stat_calls
+            if errors:
+                for k,n in errors.items(): self.errors[k]=self.errors.get(k,0)+n
+            if len(self._slow)<self._slow_n: heapq.heappush(self._slow,(seconds,d))
+            elif self._slow_n and seconds>self._slow[0][0]: heapq.heapreplace(self._slow,(seconds,d))
+        if self.parent is not None: self.parent.record_dir(d,seconds,entries,files,stat_calls,errors)
+    def error(self, kind:str):
+        with self._lock: self.errors[kind]=self.errors.get(kind,0)+1
+        if self.parent is not None: self.parent.error(kind)
+    def record_timeout(self, d:str, seconds:float):
+        # Kansio hylättiin aikarajan (dir_timeout) takia; hylätty listaus ei enää kirjaa sitä (record_dir)
+        with self._lock:
+            self.errors['TimeoutError']=self.errors.get('TimeoutError',0)+1; self.timed_out.append(d)
+            if len(self._slow)<self._slow_n: heapq.heappush(self._slow,(seconds,d))
+            elif self._slow_n and seconds>self._slow[0][0]: heapq.heapreplace(self._slow,(seconds,d))
+        if self.parent is not None: self.parent.record_timeout(d,seconds)
+    def set_queue_depth(self, n:int):
+        delta=n-self.queue_depth; self.queue_depth=n
+        if n>self.max_queue_depth: self.max_queue_depth=n
+        if self.parent is not None: self.parent._add_depth(delta)
+    def _add_depth(self, delta:int):
+        with self._lock:
+            self.queue_depth+=delta; self.max_queue_depth=max(self.max_queue_depth,self.queue_depth)
+    @property
+    def syscalls(self)->int: return self.scandir_calls+self.stat_calls
+    @property
+    def elapsed(self)->float: return max(1e-9,time.perf_counter()-self.started)
+    @property
+    def dirs_per_s(self)->float: return self.dirs/self.elapsed
+    @property
+    def files_per_s(self)->float: return self.files/self.elapsed
+    @property
+    def error_count(self)->int: return sum(self.errors.values())
+    def slowest(self)->List[Tuple[str,float]]:
+        with self._lock: return [(d,sec) for sec,d in sorted(self._slow,reverse=True)]
+    def as_dict(self)->Dict[str,int]:
+        return {'dirs':self.dirs,'entries':self.entries,'files':self.files,'scandir_calls':self.scandir_calls,
+                'stat_calls':self.stat_calls,'syscalls':self.syscalls}
+    def snapshot(self)->Dict:
+        # Koko telemetria yhtenä JSON-kelpoisena sanakirjana (API, CLI:n --stats)
+        with self._lock: errors=dict(self.errors); timed_out=list(self.timed_out)
+        return dict(self.as_dict(),elapsed_s=round(self.elapsed,3),dirs_per_s=round(self.dirs_per_s,1),
+                    files_per_s=round(self.files_per_s,1),bytes_seen=self.bytes_seen,queue_depth=self.queue_depth,
+                    max_queue_depth=self.max_queue_depth,errors=errors,timed_out=timed_out,
+                    slowest_dirs=[{'path':d,'seconds':round(sec,4)} for d,sec in self.slowest()])
+
+def _stat_cost(entry:os.DirEntry, follow_symlinks:bool)->int:
+    # Windowsissa DirEntry.stat() saadaan hakemistolistauksesta ilman omaa kutsua (paitsi seurattaessa symlinkkiä)
+    if os.name=='nt' and not (follow_symlinks and entry.is_symlink()): return 0
+    return 1
+
+def _list_dir(d:str, follow_symlinks:bool, skip_hidden:bool, exclude_dirs:List[str], same_fs_only:bool,
+              root_dev:Optional[int], stop_flag:threading.Event, excl:Optional[ExcludeMatcher],
+              walk_stats:Optional[WalkStats]=None, prestat:Optional[Callable[[str],bool]]=None,
+              abandon:Optional['_Abandon']=None)->Tuple[List[str],List[os.DirEntry]]:
+    # Yhden kansion läpikäynti: palauttaa (alikansiot, tiedostojen DirEntryt) suodatettuna. Poissuljetut alikansiot
+    # karsitaan jo tässä, joten pinoon/jonoon päätyy vain läpikäytäviä kansioita. Tyyppi tulee d_type:stä;
+    # stat tehdään vain laitetarkistukseen (DirEntryn oma, välimuistiin jäävä) ja prestat-ehdon läpäiseville
+    # tiedostoille, joiden DirEntry.stat() on sen jälkeen ilmainen. abandon: _TimedListerin hylkäämää listausta ei kirjata.
+    subdirs:List[str]=[]; files:List[os.DirEntry]=[]; n_entries=0; n_stat=0
+    errors:Dict[str,int]={}; t0=time.perf_counter()
+    if excl is not None:
+        adir=os.path.abspath(d); adir_len=len(adir); check_prefix=excl.prefix_below(adir)
+    try:
+        with os.scandir(d) as it:
+            while True:
+                if stop_flag.is_set(): break
+                try:
+                    entry=next(it)
+                except StopIteration:
+                    break
+                except (TimeoutError,OSError) as e:
+                    errors[type(e).__name__]=errors.get(type(e).__name__,0)+1
+                    break
+                n_entries+=1
+                try:
+                    name=entry.name
+                    if skip_hidden and name.startswith('.'): continue
+                    full=entry.path
+                    if excl is not None and excl.entry_excluded(os.path.join(adir,name), adir_len, check_prefix):
+                        continue
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        if name in exclude_dirs: continue
+                        if same_fs_only and root_dev is not None:
+                            n_stat+=_stat_cost(entry,False)
+                            try:
+                                if entry.stat(follow_symlinks=False).st_dev!=root_dev:
+                                    continue
+                            except Exception as e:
+                                errors[type(e).__name__]=errors.get(type(e).__name__,0)+1
+                                continue
+                        subdirs.append(full)
+                    else:
+                        if prestat is not None and prestat(name):
+                            n_stat+=_stat_cost(entry,follow_symlinks)
+                            try: entry.stat(follow_symlinks=follow_symlinks)
+                            except OSError: pass
+                        files.append(entry)
+                except (PermissionError,FileNotFoundError,TimeoutError,OSError) as e:
+                    errors[type(e).__name__]=errors.get(type(e).__name__,0)+1
+                    continue
+    except (PermissionError,FileNotFoundError,TimeoutError,OSError) as e:
+        errors[type(e).__name__]=errors.get(type(e).__name__,0)+1
+    if walk_stats is not None and (abandon is None or abandon.finish()):
+        walk_stats.record_dir(d,time.perf_counter()-t0,n_entries,len(files),n_stat,errors)
+    return subdirs, files
+
+class _AnyFlag:
+    # stop_flagin korvike: asetettu, jos jompikumpi tapahtumista on asetettu
+    __slots__=('a','b')
+    def __init__(self, a, b): self.a=a; self.b=b
+    def is_set(self)->bool: return self.a.is_set() or self.b.is_set()
+
+class _Abandon:
+    # Yhden ajastetun listauksen lopputulos: joko kutsuja hylkää sen (set) tai listaus ehtii valmiiksi (finish).
+    # Lukon alla vain ensimmäinen onnistuu, joten kansio kirjataan joko listatuksi tai aikarajan ylittäneeksi.
+    __slots__=('_lock','_state')
+    def __init__(self): self._lock=threading.Lock(); self._state=0
+    def is_set(self)->bool: return self._state==1
+    def _claim(self, state:int)->bool:
+        with self._lock:
+            if self._state: return False
+            self._state=state; return True
+    def set(self)->bool: return self._claim(1)
+    def finish(self)->bool: return self._claim(2)
+
+MAX_ABANDONED=16  # yhtä aikaa jumissa olevat hylätyt apusäikeet (koko prosessi)
+_abandoned=[0]; _abandoned_lock=threading.Lock()
+
+class _TimedLister:
+    # Kansion listaus apusäikeessä aikarajalla: jumiutunut kansio (esim. katkennut verkkolevy) hylätään
+    # TimeoutErrorilla ja seuraava kansio saa uuden apusäikeen. Hylätty listaus lopettaa seuraavan
+    # tiedoston kohdalla, kun jumiutunut kutsu joskus palaa, eikä kirjaa kansiota. Hylättyjä apusäikeitä on
+    # korkeintaan MAX_ABANDONED; sen jälkeen jumiutunutta listausta odotetaan (kuten ilman aikarajaa) pysäytykseen asti.
+    def __init__(self, timeout:float, stop_flag:threading.Event, walk_stats:Optional[WalkStats], args:tuple):
+        self.timeout=timeout; self.stop_flag=stop_flag; self.walk_stats=walk_stats; self.args=args
+        self._spawn()
+    def _spawn(self):
+        jobs:queue.SimpleQueue=queue.SimpleQueue(); results:queue.SimpleQueue=queue.SimpleQueue(); abandoned=[False]
+        def run():
+            try:
+                while True:
+                    job=jobs.get()
+                    if job is None: return
+                    try: results.put((True,job()))
+                    except BaseException as e: results.put((False,e))
+            finally:
+                if abandoned[0]:
+                    with _abandoned_lock: _abandoned[0]-=1
+        threading.Thread(target=run,daemon=True).start()
+        self._jobs=jobs; self._results=results; self._abandoned=abandoned
+    def _replace(self, counted:bool):
+        # Nykyinen apusäie jää hylättynä odottamaan jumiutunutta kutsua ja poistuu sen palattua
+        self._abandoned[0]=counted; self._jobs.put(None); self._spawn()
+    def __call__(self, d:str)->Tuple[List[str],List[os.DirEntry]]:
+        abandon=_Abandon(); flag=_AnyFlag(self.stop_flag,abandon)
+        follow_symlinks,skip_hidden,exclude_dirs,same_fs_only,root_dev,excl,prestat=self.args
+        self._jobs.put(lambda:_list_dir(d, follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, root_dev, flag, excl,
+                                        self.walk_stats, prestat, abandon))
+        timeout=self.timeout
+        while True:
+            try: ok,v=self._results.get(timeout=timeout); break
+            except queue.Empty: pass
+            # Pysäytettäessä hylätään aina (listaus lopettaa itse); muuten vain, jos hylättyjä on alle MAX_ABANDONED
+            counted=False
+            if not self.stop_flag.is_set():
+                with _abandoned_lock:
+                    if _abandoned[0]<MAX_ABANDONED: _abandoned[0]+=1; counted=True
+                if not counted: timeout=0.1; continue
+            if not abandon.set():
+                # Listaus ehti valmiiksi juuri ennen hylkäystä: tulos on tulossa jonoon
+                if counted:
+                    with _abandoned_lock: _abandoned[0]-=1
+                timeout=None; continue
+            self._replace(counted)
+            if self.walk_stats is not None: self.walk_stats.record_timeout(d,self.timeout)
+            raise TimeoutError(d)
+        if not ok: raise v
+        return v
+    def close(self): self._jobs.put(None)
+
+def _dir_lister(follow_symlinks:bool, skip_hidden:bool, exclude_dirs:List[str], same_fs_only:bool, root_dev:Optional[int],
+                stop_flag:threading.Event, excl:Optional[ExcludeMatcher], walk_stats:Optional[WalkStats],
+                prestat:Optional[Callable[[str],bool]], dir_timeout:Optional[float]=None)->Callable[[str],Tuple[List[str],List[os.DirEntry]]]:
+    # Ilman aikarajaa listataan suoraan kutsujan säikeessä; aikarajalla listaus voi nostaa TimeoutErrorin.
+    # Yksi lister säiettä kohden (rinnakkaisessa läpikäynnissä jokaisella työntekijällä omansa); _close_lister lopuksi.
+    if dir_timeout:
+        return _TimedLister(dir_timeout, stop_flag, walk_stats, (follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, root_dev, excl, prestat))
+    return lambda d:_list_dir(d, follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, root_dev, stop_flag, excl, walk_stats, prestat)
+
+def _close_lister(list_dir):
+    # Vapauttaa _TimedListerin joutilaan apusäikeen
+    if isinstance(list_dir,_TimedLister): list_dir.close()
+
+def _root_dev(root:str, same_fs_only:bool)->Optional[int]:
+    try:
+        return os.stat(root).st_dev if same_fs_only else None
+    except Exception:
+        return None
+
+def iter_tree(root:str, follow_symlinks:bool, skip_hidden:bool, exclude_dirs:List[str], same_fs_only:bool,
+              progress_cb:Optional[Callable[[str],None]], stop_flag:threading.Event,
+              exclude_substrings:List[str], walk_stats:Optional[WalkStats]=None,
+              prestat:Optional[Callable[[str],bool]]=None, dir_timeout:Optional[float]=None,
+              heartbeat:Optional[Callable[[],None]]=None)->Iterable[os.DirEntry]:
+    # Palauttaa tiedostojen DirEntryt; ks. _list_dir prestat-ehdosta. dir_timeout (s): aikarajan ylittävä kansio ohitetaan.
+    # heartbeat kutsutaan kutsujan säikeessä joka kierroksella myös tiedostottomissa kansioissa (scan_files: erän ajastin).
+    root_dev=_root_dev(root, same_fs_only)
+    excl=ExcludeMatcher.compile(exclude_substrings)
+    if excl is not None and excl.match(os.path.abspath(root)): return
+    list_dir=_dir_lister(follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, root_dev, stop_flag, excl, walk_stats, prestat, dir_timeout)
+    stack=[root]; last_progress=0.0
+    try:
+        while stack and not stop_flag.is_set():
+            if heartbeat: heartbeat()
+            d=stack.pop()
+            try: subdirs,files=list_dir(d)
+            except TimeoutError: continue
+            stack.extend(subdirs)
+            if walk_stats is not None: walk_stats.set_queue_depth(len(stack))
+            yield from files
+            if progress_cb:
+                t=time.time()
+                if t-last_progress>0.25:
+                    last_progress=t
+                    try: progress_cb(d)
+                    except Exception: pass
+    finally:
+        _close_lister(list_dir)
+
+DEFAULT_WORKERS=min(8,(os.cpu_count() or 2)*2)
+_WALK_DONE=object()
+
+def iter_tree_parallel(root:str, follow_symlinks:bool, skip_hidden:bool, exclude_dirs:List[str], same_fs_only:bool,
+                       progress_cb:Optional[Callable[[str],None]], stop_flag:threading.Event,
+                       exclude_substrings:List[str], workers:int=DEFAULT_WORKERS, walk_stats:Optional[WalkStats]=None,
+                       prestat:Optional[Callable[[str],bool]]=None, dir_timeout:Optional[float]=None,
+                       heartbeat:Optional[Callable[[],None]]=None)->Iterable[os.DirEntry]:
+    # Rinnakkainen läpikäynti: työntekijät poimivat kansioita yhteisestä jonosta ja tekevät myös prestat-statit,
+    # joten nekin rinnakkaistuvat. Tulokset palautetaan kutsujan säikeessä, joten progress_cb ajetaan samassa
+    # säikeessä kuin iter_tree:ssä.
+    root_dev=_root_dev(root, same_fs_only)
+    excl=ExcludeMatcher.compile(exclude_substrings)
+    if excl is not None and excl.match(os.path.abspath(root)): return
+    work:queue.Queue=queue.Queue(); out:queue.Queue=queue.Queue(maxsize=max(64,workers*16))
+    halt=threading.Event(); lock=threading.Lock(); pending=[1]
+    def stopped()->bool: return halt.is_set() or stop_flag.is_set()
+    def put_out(item)->None:
+        while not stopped():
+            try: out.put(item,timeout=0.1); return
+            except queue.Full: continue
+    def worker():
+        list_dir=_dir_lister(follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, root_dev, stop_flag, excl, walk_stats, prestat, dir_timeout)
+        try:
+            while not stopped():
+                try: d=work.get(timeout=0.1)
+                except queue.Empty: continue
+                if d is None: return
+                subdirs:List[str]=[]; files:List[os.DirEntry]=[]
+                try:
+                    subdirs,files=list_dir(d)
+                except TimeoutError:
+                    pass
+                finally:
+                    # Tulokset jonoon ennen laskurin vähennystä, jotta _WALK_DONE tulee aina viimeisenä
+                    put_out((d,files))
+                    with lock:
+                        pending[0]+=len(subdirs)-1; done=pending[0]==0
+                        if walk_stats is not None: walk_stats.set_queue_depth(pending[0])
+                    for sd in subdirs: work.put(sd)
+                    if done:
+                        for _ in range(workers): work.put(None)
+                        put_out(_WALK_DONE)
+        finally:
+            _close_lister(list_dir)
+    work.put(root)
+    threads=[threading.Thread(target=worker,daemon=True) for _ in range(max(1,workers))]
+    for t in threads: t.start()
+    last_progress=0.0
+    try:
+        while not stop_flag.is_set():
+            if heartbeat: heartbeat()
+            try: item=out.get(timeout=0.1)
+            except queue.Empty:
+                if not any(t.is_alive() for t in threads): break
+                continue
+            if item is _WALK_DONE: break
+            d,files=item
+            yield from files
+            if progress_cb:
+                t=time.time()
+                if t-last_progress>0.25:
+                    last_progress=t
+                    try: progress_cb(d)
+                    except Exception: pass
+    finally:
+        halt.set()
+
+class PipelineStats:
+    # Skannauksen tuottaja/kuluttaja-laskurit. Jokaista kenttää kirjoittaa vain yksi säie (ks. kommentit),
+    # joten lukitusta ei tarvita; lukijat näkevät korkeintaan hetken vanhan arvon.
+    def __init__(self):
+        self.started=time.perf_counter()
+        self.produced=0; self.batches=0; self.blocked_s=0.0; self.depth=0; self.max_depth=0  # tuottaja
+        self.consumed=0                                                                     # kuluttaja
+    @property
+    def elapsed(self)->float: return max(1e-9,time.perf_counter()-self.started)
+    @property
+    def produced_per_s(self)->float: return self.produced/self.elapsed
+    @property
+    def consumed_per_s(self)->float: return self.consumed/self.elapsed
+
+def put_batch(q:queue.Queue, batch:List[FileInfo], stop_flag:threading.Event, stats:Optional[PipelineStats]=None)->bool:
+    # Backpressure: täyteen jonoon odotetaan tilaa eikä tuloksia pudoteta. False vain jos skannaus pysäytettiin.
+    t0=time.perf_counter()
+    while True:
+        if stop_flag.is_set(): return False
+        try: q.put(batch,timeout=0.1); break
+        except queue.Full: continue
+    if stats is not None:
+        stats.produced+=len(batch); stats.batches+=1; stats.blocked_s+=time.perf_counter()-t0
+        stats.depth=q.qsize(); stats.max_depth=max(stats.max_depth,stats.depth)
+    return True
+
+def scan_files(root:str, allowed_exts:Optional[List[str]], min_size_bytes:int, follow_symlinks:bool, skip_hidden:bool,
+               exclude_dirs:List[str], same_fs_only:bool, start_ts:Optional[float], end_ts:Optional[float],
+               stop_flag:threading.Event, progress_cb=None, live_queue:Optional[queue.Queue]=None,
+               seen_paths:Optional[Set[str]]=None, exclude_substrings:Optional[List[str]]=None,
+               workers:int=1, index:Optional['ScanIndex']=None, stats:Optional[PipelineStats]=None,
+               batch_size:int=256, rollup:Optional['DirRollup']=None, dedup_inodes:bool=True,
+               walk_stats:Optional[WalkStats]=None, dir_timeout:Optional[float]=None,
+               seen_inodes:Optional[Set[Tuple[int,int]]]=None)->Iterable[FileInfo]:
+    # live_queue-tilassa tulokset lähetetään jonoon listoina (erä kerrallaan) eikä mitään yieldata.
+    # seen_paths kuuluu skannaussäikeelle: sitä ei saa käsitellä muualta skannauksen aikana.
+    # rollup saa jokaisen tiedoston ennen pääte-, koko- ja päiväysrajausta ("du" koko puusta), joten sen kanssa
+    # kaikki tiedostot statataan.
+    # dedup_inodes: kovalinkit (ja symlinkkien kautta uudelleen löytyvät tiedostot) lasketaan vain kerran;
+    # seen_inodes jakaa karsinnan peräkkäisten skannausten kesken (scan_roots: saman laitteen juuret).
+    # Päätesuodatin ajetaan läpikäynnissä ennen statia, ja stat tehdään DirEntryn kautta: korkeintaan yksi
+    # stat-kutsu ehdokasta kohden (walk_stats kertoo toteutuneet kutsut). Indeksin kanssa muuttuneiden kansioiden
+    # kaikki tiedostot statataan (tietue kelpaa kaikille suodattimille); workers rinnakkaistaa myös sen listauksen.
+    # walk_stats kerää myös telemetrian (kansiot/s, virheet, hitaimmat kansiot); dir_timeout ks. iter_tree.
+    exclude_substrings = exclude_substrings or []
+    seen_inodes=set() if seen_inodes is None else seen_inodes; classify=_classifier().classify
+    prestat=(lambda name:ext_matches(name, allowed_exts)) if allowed_exts and rollup is None else (lambda name:True)
+    batch:List[FileInfo]=[]; last_flush=time.perf_counter()
+    def flush(force:bool=False):
+        # Erä jonoon, kun se on täynnä tai edellisestä lähetyksestä on yli 0.1 s; kutsutaan myös läpikäynnin
+        # sykkeestä, joten harva osuma ei jää erään skannauksen loppuun asti
+        nonlocal batch, last_flush
+        now=time.perf_counter()
+        if batch and (force or len(batch)>=batch_size or now-last_flush>0.1):
+            put_batch(live_queue, batch, stop_flag, stats); batch=[]; last_flush=now
+    heartbeat=flush if live_queue is not None else None
+    if index is not None:
+        walker=iter_tree_indexed(root, follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, progress_cb, stop_flag, exclude_substrings, index, walk_stats, dir_timeout, workers, heartbeat)
+    elif workers>1:
+        walker=iter_tree_parallel(root, follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, progress_cb, stop_flag, exclude_substrings, workers, walk_stats, prestat, dir_timeout, heartbeat)
+    else:
+        walker=iter_tree(root, follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, progress_cb, stop_flag, exclude_substrings, walk_stats, prestat, dir_timeout, heartbeat)
+    try:
+        for item in walker:
+            try:
+                path=item[0] if index is not None else item.path
+                wanted=ext_matches(path, allowed_exts)
+                if not wanted and rollup is None: continue
+                norm=os.path.abspath(path)
+                if seen_paths is not None and norm in seen_paths: continue
+                if index is not None:
+                    _,size,cts,dev,ino,nlink=item
+                else:
+                    st=item.stat(follow_symlinks=follow_symlinks)  # läpikäynti on jo statannut (prestat)
+                    size=st.st_size; cts=get_created_ts(st); dev=st.st_dev; ino=st.st_ino; nlink=st.st_nlink
+                # Vain nlink>1 (tai symlinkkejä seuratessa kaikki) pidetään muistissa
+                if dedup_inodes and ino and (nlink>1 or follow_symlinks):
+                    if (dev,ino) in seen_inodes: continue
+                    seen_inodes.add((dev,ino))
+                if walk_stats is not None: walk_stats.add(bytes_seen=size)
+                if rollup is not None: rollup.add(norm, size)
+                if not wanted or size<min_size_bytes: continue
+                if not in_date_range(cts,start_ts,end_ts): continue
+                status,reason=classify(norm)
+                fi=FileInfo(path=path,size=size,created_ts=cts,status=status,reason=reason,dev=dev,ino=ino)
+                if seen_paths is not None: seen_paths.add(norm)
+                if live_queue is not None:
+                    batch.append(fi); flush()
+                else:
+                    yield fi
+            except (PermissionError,FileNotFoundError,TimeoutError,OSError) as e:
+                if walk_stats is not None: walk_stats.error(type(e).__name__)
+                continue
+    finally:
+        if live_queue is not None: flush(True)
+
+# ---- kansiokooste ("du") ----
+
+@dataclass
+class DirTotal:
+    path: str
+    size: int
+    files: int
+
+def _dir_depth(d:str)->int:
+    return 0 if os.path.dirname(d)==d else d.count(os.sep)
+
+class DirRollup:
+    # "du"-kooste samasta läpikäynnistä: skannauksen aikana tiedoston koko lisätään vain sen omaan kansioon,
+    # ja summat nostetaan juureen asti vasta kysyttäessä (totals/top). Juurien yläpuolelle ei summata.
+    def __init__(self, roots:Iterable[str]):
+        self.roots={os.path.abspath(r) for r in roots}
+        self._direct:Dict[str,List[int]]={}; self.total_size=0; self.total_files=0
+    def add(self, apath:str, size:int):
+        d=os.path.dirname(apath); t=self._direct.get(d)
+        if t is None: self._direct[d]=[size,1]
+        else: t[0]+=size; t[1]+=1
+        self.total_size+=size; self.total_files+=1
+    def merge(self, other:'DirRollup'):
+        # Toisen (esim. toisen säikeen) koosteen suorat kansiosummat tähän; juuret ratkaisevat nostot kuten ennenkin
+        for d,(size,n) in other._direct.items():
+            t=self._direct.get(d)
+            if t is None: self._direct[d]=[size,n]
+            else: t[0]+=size; t[1]+=n
+        self.total_size+=other.total_size; self.total_files+=other.total_files
+    def totals(self)->Dict[str,Tuple[int,int]]:
+        levels:Dict[int,Dict[str,List[int]]]={}
+        for d,(size,n) in self._direct.items(): levels.setdefault(_dir_depth(d),{})[d]=[size,n]
+        out:Dict[str,Tuple[int,int]]={}
+        for depth in range(max(levels,default=0),-1,-1):
+            for d,(size,n) in levels.get(depth,{}).items():
+                out[d]=(size,n)
+                parent=os.path.dirname(d)
+                if d in self.roots or parent==d: continue
+                p=levels.setdefault(depth-1,{}).setdefault(parent,[0,0]); p[0]+=size; p[1]+=n
+        return out
+    def top(self, n:int)->List[DirTotal]:
+        best=heapq.nlargest(n,self.totals().items(),key=lambda kv:kv[1][0])
+        return [DirTotal(path=d,size=size,files=files) for d,(size,files) in best]
+
+# ---- sisällöltään identtiset tiedostot ----
+
+PARTIAL_HASH_BYTES=4096
+_HASH_CHUNK=1<<20
+
+def _partial_digest(fi:FileInfo)->Optional[bytes]:
+    # Alun ja lopun PARTIAL_HASH_BYTES tavua; pienellä tiedostolla tämä kattaa koko sisällön
+    from hashlib import blake2b
+    try:
+        h=blake2b(digest_size=16)
+        with open(fi.path,'rb') as f:
+            h.update(f.read(PARTIAL_HASH_BYTES))
+            if fi.size>PARTIAL_HASH_BYTES:
+                f.seek(max(PARTIAL_HASH_BYTES,fi.size-PARTIAL_HASH_BYTES)); h.update(f.read(PARTIAL_HASH_BYTES))
+        return h.digest()
+    except OSError:
+        return None
+
+def _full_digest(fi:FileInfo, stop_flag:Optional[threading.Event]=None)->Optional[bytes]:
+    from hashlib import blake2b
+    try:
+        h=blake2b(digest_size=32); buf=bytearray(_HASH_CHUNK); view=memoryview(buf)
+        with open(fi.path,'rb',buffering=0) as f:
+            while True:
+                if stop_flag is not None and stop_flag.is_set(): return None
+                n=f.readinto(buf)
+                if not n: break
+                h.update(view[:n])
+        return h.digest()
+    except OSError:
+        return None
+
+def _split_by(groups:List[List[FileInfo]], digest, pool:'ThreadPoolExecutor')->List[List[FileInfo]]:
+    flat=[fi for g in groups for fi in g]
+    out:List[List[FileInfo]]=[]; i=0
+    digests=list(pool.map(digest,flat))
+    for g in groups:
+        buckets:Dict[bytes,List[FileInfo]]={}
+        for fi in g:
+            d=digests[i]; i+=1
+            if d is not None: buckets.setdefault(d,[]).append(fi)
+        out.extend(b for b in buckets.values() if len(b)>1)
+    return out
+
+def find_duplicates(files:Iterable[FileInfo], workers:int=4, min_size:int=1,
+                    stop_flag:Optional[threading.Event]=None)->List[List[FileInfo]]:
+    # Vaiheittain: 1) ryhmittely koon mukaan, 2) alun+lopun tiiviste, 3) koko sisällön tiiviste vain
+    # niille, jotka yhä törmäävät. Saman inoden polut (kovalinkit) eivät ole kaksoiskappaleita.
+    # Palauttaa ryhmät hukkatilan (koko * (kpl-1)) mukaan suurimmasta alkaen.
+    by_size:Dict[int,List[FileInfo]]={}; seen_inodes:Set[Tuple[int,int]]=set()
+    for fi in files:
+        if fi.size<min_size: continue
+        if fi.ino:
+            if (fi.dev,fi.ino) in seen_inodes: continue
+            seen_inodes.add((fi.dev,fi.ino))
+        by_size.setdefault(fi.size,[]).append(fi)
+    groups=[g for g in by_size.values() if len(g)>1]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max(1,workers)) as pool:
+        if groups and not (stop_flag and stop_flag.is_set()):
+            groups=_split_by(groups,_partial_digest,pool)
+        small=[g for g in groups if g[0].size<=PARTIAL_HASH_BYTES]
+        large=[g for g in groups if g[0].size>PARTIAL_HASH_BYTES]
+        if large and not (stop_flag and stop_flag.is_set()):
+            large=_split_by(large,lambda fi:_full_digest(fi,stop_flag),pool)
+    if stop_flag is not None and stop_flag.is_set(): return []
+    return sorted(small+large,key=lambda g:g[0].size*(len(g)-1),reverse=True)
+
+# ---- pysyvä indeksi ----
+
+def default_index_path()->str:
+    if sys.platform=='darwin': base=os.path.expanduser('~/Library/Caches')
+    elif os.name=='nt': base=os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else: base=os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base,'largest_files_finder','index.sqlite3')
+
+def index_signature(follow_symlinks:bool, skip_hidden:bool, exclude_dirs:List[str], same_fs_only:bool,
+                    exclude_substrings:List[str])->str:
+    # Läpikäyntiin vaikuttavat asetukset; eri asetuksilla tallennetut kansiot eivät sekoitu
+    import hashlib, json
+    key=json.dumps([follow_symlinks,skip_hidden,sorted(exclude_dirs),same_fs_only,sorted(x.strip() for x in exclude_substrings)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+INDEX_FORMAT=3
+FileRecord=Tuple[str,int,float,int,int,int]  # (nimi, koko, luotu, st_dev, st_ino, st_nlink)
+
+INDEX_BATCH=256  # puskuroituja kansiotietueita ennen kirjoitusta
+
+class ScanIndex:
+    # Kansiokohtainen SQLite-indeksi: (mtime, inode) + alikansiot ja tiedostotietueet (FileRecord).
+    # Kansio, jonka mtime/inode ei ole muuttunut, luetaan indeksistä listaamatta ja stat'aamatta sitä uudelleen.
+    # Huom: tiedoston sisällön muutos ei päivitä kansion mtimea, joten paikallaan kasvaneen tiedoston koko voi olla vanha.
+    # Kirjoitukset puskuroidaan ja viedään lyhyinä transaktioina (commit): SQLite sallii yhden kirjoittajan kerrallaan,
+    # ja monijuurisessa skannauksessa laiteryhmät jakavat saman tiedoston. Vanhentuneet tietueet poistetaan vain
+    # uudelleen listatun kansion kadonneiden alikansioiden alta, joten muiden juurten tietueisiin ei kosketa.
+    # Avauksen jälkeinen SQLite-virhe (esim. lukko) ei keskeytä skannausta: error talletetaan, ja indeksi toimii
+    # siitä eteenpäin pelkkinä hutina (läpikäynti jatkuu listaamalla).
+    def __init__(self, path:str):
+        import sqlite3
+        os.makedirs(os.path.dirname(path) or '.',exist_ok=True)
+        # WAL + odotusaika: monijuurisessa skannauksessa jokaisella juurisäikeellä on oma yhteys samaan tiedostoon
+        self.db=sqlite3.connect(path,timeout=60)
+        try: self.db.execute('PRAGMA journal_mode=WAL'); self.db.execute('PRAGMA synchronous=NORMAL')
+        except sqlite3.Error: pass
+        if self.db.execute('PRAGMA user_version').fetchone()[0]!=INDEX_FORMAT:
+            # Vanhan muodon tietueet eivät kelpaa: aloitetaan tyhjästä
+            self.db.execute('DROP TABLE IF EXISTS dirs'); self.db.execute(f'PRAGMA user_version={INDEX_FORMAT}')
+        self.db.execute('CREATE TABLE IF NOT EXISTS dirs(sig TEXT, path TEXT, mtime_ns INTEGER, ino INTEGER, scan_id INTEGER, '
+                        'subdirs TEXT, files TEXT, PRIMARY KEY(sig,path))')
+        self.db.commit()
+        self.scan_id=time.time_ns(); self.hits=0; self.misses=0
+        self._rows:List[tuple]=[]; self._gone:List[Tuple[str,str]]=[]; self._old:Dict[Tuple[str,str],str]={}
+        self.error:Optional[Exception]=None; self._db_errors=(sqlite3.Error,)
+    def lookup(self, sig:str, path:str, mtime_ns:int, ino:int)->Optional[Tuple[List[str],List[FileRecord]]]:
+        row=None
+        if self.error is None:
+            try: row=self.db.execute('SELECT mtime_ns,ino,subdirs,files FROM dirs WHERE sig=? AND path=?',(sig,path)).fetchone()
+            except self._db_errors as e: self.error=e
+        if row is None or row[0]!=mtime_ns or row[1]!=ino:
+            if row is not None: self._old[(sig,path)]=row[2]  # store vertaa alikansioita
+            self.misses+=1; return None
+        self.hits+=1
+        import json
+        return json.loads(row[2]), [tuple(f) for f in json.loads(row[3])]
+    def store(self, sig:str, path:str, mtime_ns:int, ino:int, subdirs:List[str], files:List[FileRecord]):
+        old=self._old.pop((sig,path),None)
+        if self.error is not None: return
+        import json
+        if old is not None:
+            self._gone.extend((sig,os.path.join(path,n)) for n in set(json.loads(old))-set(subdirs))
+        self._rows.append((sig,path,mtime_ns,ino,self.scan_id,json.dumps(subdirs),json.dumps(files,separators=(',',':'))))
+        if len(self._rows)>=INDEX_BATCH: self.commit()
+    def commit(self):
+        rows,gone=self._rows,self._gone; self._rows=[]; self._gone=[]
+        if self.error is not None: return
+        try:
+            if gone:
+                self.db.executemany('DELETE FROM dirs WHERE sig=? AND (path=? OR substr(path,1,?)=?)',
+                                    [(sig,p,len(p)+1,p+os.sep) for sig,p in gone])
+            if rows: self.db.executemany('INSERT OR REPLACE INTO dirs VALUES(?,?,?,?,?,?,?)',rows)
+            self.db.commit()
+        except self._db_errors as e:
+            self.error=e
+            try: self.db.rollback()
+            except self._db_errors: pass
+    def close(self):
+        try: self.commit()
+        finally: self.db.close()
+
+def _dir_records(list_dir:Callable[[str],Tuple[List[str],List[os.DirEntry]]], d:str,
+                 follow_symlinks:bool)->Optional[Tuple[List[str],List[FileRecord]]]:
+    # Indeksin hutikansio: listaus + FileRecordit; None, jos aikaraja ylittyi (ei tallenneta)
+    try: subdirs,entries=list_dir(d)
+    except TimeoutError: return None
+    files=[]
+    for entry in entries:
+        try: st=entry.stat(follow_symlinks=follow_symlinks)  # listaus on jo statannut
+        except (PermissionError,FileNotFoundError,TimeoutError,OSError): continue
+        files.append((entry.name,st.st_size,get_created_ts(st),st.st_dev,st.st_ino,st.st_nlink))
+    return subdirs,files
+
+def iter_tree_indexed(root:str, follow_symlinks:bool, skip_hidden:bool, exclude_dirs:List[str], same_fs_only:bool,
+                      progress_cb:Optional[Callable[[str],None]], stop_flag:threading.Event,
+                      exclude_substrings:List[str], index:ScanIndex, walk_stats:Optional[WalkStats]=None,
+                      dir_timeout:Optional[float]=None, workers:int=1,
+                      heartbeat:Optional[Callable[[],None]]=None)->Iterable[tuple]:
+    # Kuten iter_tree, mutta palauttaa (polku, koko, luotu, st_dev, st_ino, st_nlink) ja lukee muuttumattomat kansiot indeksistä.
+    # SQLite-yhteys on säiesidonnainen, joten haku ja tallennus tehdään kutsujan säikeessä; workers>1: muuttuneiden
+    # kansioiden listaus ja statit tehdään työsäikeissä (kuten iter_tree_parallel) ja tulokset tallennetaan täällä.
+    sig=index_signature(follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, exclude_substrings)
+    root_dev=_root_dev(root, same_fs_only)
+    excl=ExcludeMatcher.compile(exclude_substrings)
+    if excl is not None and excl.match(os.path.abspath(root)): return
+    # Indeksiin tallennetaan kaikki tiedostot, jotta sama tietue kelpaa millä tahansa päätesuodattimella,
+    # joten kaikki statataan (päätesuodatus vasta scan_filesissa). Samoin alikansiot tallennetaan laitteesta
+    # riippumatta: liitos ei muuta yläkansion mtimea, joten laite tarkistetaan joka kerta kansion omasta statista.
+    halt=threading.Event(); flag=_AnyFlag(stop_flag,halt)
+    def lister(): return _dir_lister(follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, None, flag, excl, walk_stats, lambda name:True, dir_timeout)
+    results:queue.SimpleQueue=queue.SimpleQueue(); work:queue.SimpleQueue=queue.SimpleQueue(); n_threads=max(1,workers) if workers>1 else 0
+    def worker():
+        list_dir=lister()
+        while True:
+            job=work.get()
+            if job is None: _close_lister(list_dir); return
+            listed=None
+            if not halt.is_set():
+                try: listed=_dir_records(list_dir, job[0], follow_symlinks)
+                except Exception: listed=None
+            results.put((*job,listed))
+    if n_threads:
+        for _ in range(n_threads): threading.Thread(target=worker,daemon=True).start()
+        submit=work.put
+        list_dir=None
+    else:
+        list_dir=lister()
+        def submit(job): results.put((*job,_dir_records(list_dir, job[0], follow_symlinks)))
+    stack=[root]; inflight=0; last_progress=0.0
+    try:
+        while not stop_flag.is_set():
+            if heartbeat: heartbeat()
+            try: res=results.get(timeout=0.1) if inflight and not stack else results.get_nowait()
+            except queue.Empty:
+                if stack: res=None
+                elif inflight: continue
+                else: break
+            if res is not None:
+                inflight-=1
+                d,mtime_ns,ino,listed=res
+                if listed is None: continue  # aikaraja: ei tallenneta, seuraava skannaus yrittää uudelleen
+                if stop_flag.is_set(): break  # keskeneräistä listausta ei tallenneta
+                subdirs,files=listed
+                index.store(sig, d, mtime_ns, ino, [os.path.basename(x) for x in subdirs], files)
+            else:
+                d=stack.pop()
+                if walk_stats is not None: walk_stats.add(stat_calls=1)
+                try:
+                    dst=os.stat(d); mtime_ns=dst.st_mtime_ns; ino=dst.st_ino
+                    # Liitospiste (same_fs_only); symlinkkejä seuratessa laite katsotaan linkistä kuten _list_dirissä
+                    dev=(os.lstat(d) if follow_symlinks and d!=root else dst).st_dev
+                except (PermissionError,FileNotFoundError,TimeoutError,OSError) as e:
+                    if walk_stats is not None: walk_stats.error(type(e).__name__)
+                    continue
+                if root_dev is not None and dev!=root_dev: continue
+                cached=index.lookup(sig, d, mtime_ns, ino)
+                if cached is None:
+                    submit((d,mtime_ns,ino)); inflight+=1; continue
+                names,files=cached
+                subdirs=[os.path.join(d,n) for n in names]
+                if walk_stats is not None: walk_stats.add(dirs=1,files=len(files))
+            stack.extend(subdirs)
+            if walk_stats is not None: walk_stats.set_queue_depth(len(stack)+inflight)
+            for name,*rec in files:
+                yield (os.path.join(d,name),*rec)
+            if progress_cb:
+                t=time.time()
+                if t-last_progress>0.25:
+                    last_progress=t
+                    try: progress_cb(d)
+                    except Exception: pass
+    finally:
+        halt.set()
+        for _ in range(n_threads): work.put(None)
+        _close_lister(list_dir)
+        index.commit()
+
+# ---- top-N kooste ----
+
+class TopN:
+    # Pitää muistissa vain N suurinta osumaa (min-keko koon mukaan), pudotetuista juoksevat summat.
+    # Alkio voi olla FileInfo (push) tai mikä tahansa koon kanssa annettu tunniste, esim. ResultStoren rivi (push_sized).
+    def __init__(self, n:int):
+        self.n=max(0,n); self._heap:List[tuple]=[]; self._seq=0
+        self.dropped_count=0; self.dropped_bytes=0
+    def __len__(self)->int: return len(self._heap)
+    def drop(self, size:int):
+        self.dropped_count+=1; self.dropped_bytes+=size
+    def accepts(self, size:int)->bool:
+        return len(self._heap)<self.n or (self.n>0 and size>self._heap[0][0])
+    def push_sized(self, size:int, item)->Tuple[bool,object]:
+        # Palauttaa (jäikö item listalle, listalta pudonnut alkio tai None)
+        entry=(size,self._seq,item); self._seq+=1
+        if len(self._heap)<self.n:
+            heapq.heappush(self._heap,entry); return True,None
+        if self.n and size>self._heap[0][0]:
+            old=heapq.heapreplace(self._heap,entry); self.drop(old[0]); return True,old[2]
+        self.drop(size); return False,None
+    def push(self, fi:FileInfo)->Tuple[bool,Optional[FileInfo]]: return self.push_sized(fi.size,fi)
+    def add(self, fi:FileInfo)->bool: return self.push(fi)[0]
+    def items(self)->list:
+        return [it[2] for it in sorted(self._heap,reverse=True)]
+
+# ---- sarakkeittainen tulosvarasto ----
+
+STATUS_CODES={SAFE:1,CAUTION:2,SYSTEM:3}  # järjestys = STATUS_ORDER; 0 = poistettu rivi
+CODE_STATUS={v:k for k,v in STATUS_CODES.items()}
+
+class ResultStore:
+    # Tulokset sarakkeina: kansiopolut internoituna taulukkoon, tiedostonimet listana, koot/ajat/inodet
+    # array-sarakkeina ja status tavuina. Rivi tunnistetaan numerolla (rid); poistetun rivin status on 0
+    # ja sen paikka käytetään uudelleen. FileInfo luodaan rivistä vasta kun sitä tarvitaan (get).
+    def __init__(self):
+        self.clear()
+    def clear(self):
+        self.dirs:List[str]=[]; self._dir_ids:Dict[str,int]={}; self._dirs_lower:List[str]=[]
+        self.reasons:List[str]=[]; self._reason_ids:Dict[str,int]={}
+        self.dir_id=array('q'); self.names:List[str]=[]
+        self.size=array('q'); self.created=array('d'); self.status=bytearray(); self.reason_id=array('q')
+        self.dev=array('Q'); self.ino=array('Q')
+        self._free:List[int]=[]; self._live=0
+    def __len__(self)->int: return self._live
+    def _intern_dir(self, d:str)->int:
+        i=self._dir_ids.get(d)
+        if i is None:
+            i=self._dir_ids[d]=len(self.dirs); self.dirs.append(d); self._dirs_lower.append(d.lower())
+        return i
+    def _intern_reason(self, r:str)->int:
+        i=self._reason_ids.get(r)
+        if i is None:
+            i=self._reason_ids[r]=len(self.reasons); self.reasons.append(r)
+        return i
+    def add(self, fi:FileInfo)->int:
+        d,name=os.path.split(fi.path)
+        row=(self._intern_dir(d),name,fi.size,fi.created_ts,STATUS_CODES[fi.status],self._intern_reason(fi.reason),fi.dev,fi.ino)
+        cols=(self.dir_id,self.names,self.size,self.created,self.status,self.reason_id,self.dev,self.ino)
+        if self._free:
+            rid=self._free.pop()
+            for col,v in zip(cols,row): col[rid]=v
+        else:
+            rid=len(self.names)
+            for col,v in zip(cols,row): col.append(v)
+        self._live+=1
+        return rid
+    def remove(self, rid:int, reuse:bool=True):
+        # reuse=False: rivin paikkaa ei anneta uudelleen (jos rid voi vielä olla viitattuna muualla, esim. Top N:ssä)
+        if not self.status[rid]: return
+        self.status[rid]=0; self._live-=1
+        if reuse: self._free.append(rid)
+    def path(self, rid:int)->str: return os.path.join(self.dirs[self.dir_id[rid]],self.names[rid])
+    def get(self, rid:int)->FileInfo:
+        return FileInfo(path=self.path(rid),size=self.size[rid],created_ts=self.created[rid],status=CODE_STATUS[self.status[rid]],
+                        reason=self.reasons[self.reason_id[rid]],dev=self.dev[rid],ino=self.ino[rid])
+    def ids(self, statuses:Optional[Iterable[str]]=None)->List[int]:
+        # Suodatus statuksen mukaan yhdellä translate+compress-kierroksella (C-tasolla)
+        codes={STATUS_CODES[s] for s in statuses} if statuses is not None else set(CODE_STATUS)
+        table=bytes(1 if c in codes else 0 for c in range(256))
+        return list(itertools.compress(range(len(self.status)),self.status.translate(table)))
+    def key(self, col:Optional[str])->Callable[[int],tuple]:
+        # Lajitteluavain riville; rid ratkaisee tasatilanteet, joten avain on yksikäsitteinen
+        if col=='size': c=self.size; return lambda r:(c[r],r)
+        if col=='created': c=self.created; return lambda r:(c[r],r)
+        if col=='status': c=self.status; return lambda r:(c[r],r)
+        if col=='name': names=self.names; return lambda r:(names[r].lower(),r)
+        if col=='dir': dl=self._dirs_lower; di=self.dir_id; return lambda r:(dl[di[r]],r)
+        return lambda r:(r,)
+    def sort_ids(self, ids:List[int], col:Optional[str], desc:bool=False)->List[int]:
+        # Numeerisille sarakkeille avaimena suoraan array.__getitem__; ids nousevana -> tasatilanteet rid-järjestyksessä
+        base=sorted(ids)
+        if col in ('size','created','status'):
+            out=sorted(base,key={'size':self.size,'created':self.created,'status':self.status}[col].__getitem__)
+        else:
+            k=self.key(col); out=sorted(base,key=k)
+        if desc: out.reverse()
+        return out
+
+# ---- näkymämalli ----
+
+class ResultView:
+    # ResultStoren rivien suodatettu ja lajiteltu näkymä. Rivit (rid) pidetään nousevassa avainjärjestyksessä
+    # bisectillä; laskeva järjestys luetaan lopusta alkaen, joten lisäys ja poisto eivät lajittele koko listaa.
+    def __init__(self, store:ResultStore, visible:Optional[Set[str]]=None):
+        self.store=store; self._ids:List[int]=[]
+        self.sort_col='size'; self.sort_desc=True; self._key=store.key('size')
+        self.visible:Set[str]=set(visible) if visible is not None else {SAFE,CAUTION,SYSTEM}
+        self._visible_codes={STATUS_CODES[s] for s in self.visible}
+    def __len__(self)->int: return len(self._ids)
+    def rid_at(self, i:int)->int:
+        return self._ids[len(self._ids)-1-i] if self.sort_desc else self._ids[i]
+    def __getitem__(self, i:int)->FileInfo: return self.store.get(self.rid_at(i))
+    @property
+    def total(self)->int: return len(self.store)
+    def all(self)->List[FileInfo]: return [self.store.get(r) for r in self.store.ids()]
+    def rids(self)->List[int]: return self._ids[::-1] if self.sort_desc else list(self._ids)
+    def rows(self)->List[FileInfo]: return [self.store.get(r) for r in self.rids()]
+    def _pos(self, i:int, n:int)->int: return n-1-i if self.sort_desc else i
+    def add(self, rid:int)->Optional[int]:
+        # Palauttaa rivin näyttöpaikan tai None, jos rivi ei ole näkyvissä
+        if self.store.status[rid] not in self._visible_codes: return None
+        i=bisect.bisect_left(self._ids,self._key(rid),key=self._key)
+        self._ids.insert(i,rid)
+        return self._pos(i,len(self._ids))
+    def remove(self, rid:int)->Optional[int]:
+        # Kutsuttava ennen ResultStore.removea, koska avain luetaan varaston sarakkeista
+        if self.store.status[rid] not in self._visible_codes: return None
+        i=bisect.bisect_left(self._ids,self._key(rid),key=self._key)
+        if i>=len(self._ids) or self._ids[i]!=rid: return None
+        pos=self._pos(i,len(self._ids)); del self._ids[i]
+        return pos
+    def clear(self): self._ids=[]
+    def set_sort(self, col:Optional[str], desc:bool):
+        self.sort_col=col or 'size'; self.sort_desc=desc if col else True; self._key=self.store.key(self.sort_col); self._rebuild()
+    def set_visible(self, statuses:Set[str]):
+        if statuses==self.visible: return
+        self.visible=set(statuses); self._visible_codes={STATUS_CODES[s] for s in self.visible}; self._rebuild()
+    def _rebuild(self):
+        self._ids=self.store.sort_ids(self.store.ids(self.visible),self.sort_col)
+
+# ---- luokittelu ----
+
+_TRIE_END=None
+
+class _PrefixTrie:
+    # Merkkitason prefiksipuu; matches() käy polun läpi kerran ja palauttaa osuvien avainten arvot lyhimmästä alkaen
+    def __init__(self): self.root:Dict={}
+    def add(self, key:str, value):
+        node=self.root
+        for ch in key: node=node.setdefault(ch,{})
+        node.setdefault(_TRIE_END,[]).append(value)
+    def matches(self, s:str):
+        node=self.root
+        for ch in s:
+            if _TRIE_END in node: yield from node[_TRIE_END]
+            node=node.get(ch)
+            if node is None: return
+        if _TRIE_END in node: yield from node[_TRIE_END]
+    def has_path(self, s:str)->bool:
+        # Onko puussa avain, joka alkaa s:llä (tai on s)?
+        node=self.root
+        for ch in s:
+            node=node.get(ch)
+            if node is None: return False
+        return True
+
+CAUTION_EXTS=('.mov','.mp4','.mkv','.zip','.dmg','.pkg','.iso')
+
+class PathClassifier:
+    # SYSTEM/SAFE/CAUTION-säännöt käännettynä kerran: prefiksit puuhun, osamerkkijonot yhteen regexiin.
+    # Tulos on sama kuin sääntölistojen läpikäynti järjestyksessä (ensimmäinen osuva SAFE-sääntö antaa syyn).
+    def __init__(self, system_prefixes:List[str], safe_patterns:List[str]):
+        self._system=_PrefixTrie(); self._system_exact:Dict[str,str]={}
+        for pfx in system_prefixes:
+            self._system.add(pfx+os.sep,pfx); self._system_exact.setdefault(pfx,pfx)
+        self._safe=_PrefixTrie(); subs:List[Tuple[int,str]]=[]
+        for i,patt in enumerate(safe_patterns):
+            if patt.startswith(os.path.sep) or patt.startswith('~'):
+                self._safe.add(os.path.abspath(os.path.expanduser(patt)),(i,f'Välimuisti/build-artefakti: {patt}'))
+            else:
+                subs.append((i,patt))
+        self._sub_rules=[(i,f'Build-väliaikainen: *{patt}*') for i,patt in subs]
+        # Nollamittainen lookahead löytää päällekkäisetkin osumat; ryhmänumero kertoo säännön
+        self._sub_any=re.compile('|'.join(re.escape(p) for _,p in subs)) if subs else None
+        self._sub_re=re.compile('(?=(?:'+'|'.join(f'({re.escape(p)})' for _,p in subs)+'))') if subs else None
+
+    def classify(self, apath:str)->Tuple[str,str]:
+        pfx=self._system_exact.get(apath)
+        if pfx is None: pfx=next(self._system.matches(apath),None)
+        if pfx is not None: return SYSTEM, f'Järjestelmäpolku: {pfx}'
+        best=min(self._safe.matches(apath),default=None)
+        if self._sub_any is not None and self._sub_any.search(apath):
+            for m in self._sub_re.finditer(apath):
+                rule=self._sub_rules[m.lastindex-1]
+                if best is None or rule[0]<best[0]: best=rule
+        if best is not None: return SAFE, best[1]
+        if os.path.basename(apath).lower().endswith(CAUTION_EXTS): return CAUTION,'Iso käyttäjätiedosto/paketti'
+        if '/Downloads/' in apath: return CAUTION,'Lataukset-kansio'
+        return CAUTION,'Tuntematon (tarkista ennen poistoa)'
+
+@functools.lru_cache(maxsize=1)
+def _classifier()->PathClassifier:
+    # Rakennetaan ensimmäisellä käytöllä eikä moduulia ladattaessa (regexien käännös näkyy käynnistysajassa)
+    return PathClassifier(SYSTEM_ROOT_PREFIXES,SAFE_PATTERNS)
+
+def classify_path(path:str)->Tuple[str,str]:
+    return _classifier().classify(os.path.abspath(path))
+
+# ---- siivous ----
+
+CLEAN_BATCH=64
+
+@dataclass
+class CleanProgress:
+    # Siivoussäie päivittää, käyttöliittymä lukee; finished asetetaan viimeisenä
+    total:int=0; total_bytes:int=0
+    done:int=0; deleted:int=0; failed:int=0; bytes_freed:int=0
+    cancelled:bool=False; finished:bool=False
+
+def _applescript_str(s:str)->str:
+    return '"'+s.replace('\\','\\\\').replace('"','\\"')+'"'
+
+def _trash_darwin(paths:List[str])->bool:
+    # Yksi Finder-kutsu koko erälle: delete {POSIX file "a", POSIX file "b", …}
+    import subprocess
+    items=', '.join('POSIX file '+_applescript_str(p) for p in paths)
+    try:
+        r=subprocess.run(['osascript','-e',f'tell application "Finder" to delete {{{items}}}'],capture_output=True,check=False)
+    except OSError:
+        return False
+    return r.returncode==0
+
+def _remove_path(path:str)->bool:
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            from shutil import rmtree
+            rmtree(path)
+        else: os.remove(path)
+        return True
+    except OSError:
+        return False
+
+def _clean_batch(batch:List[Tuple[object,str,int]])->List[Tuple[object,str,int]]:
+    if sys.platform!='darwin':
+        return [it for it in batch if _remove_path(it[1])]
+    if _trash_darwin([p for _,p,_ in batch]): return batch
+    # Finder keskeyttää erän ensimmäiseen virheeseen: sitä ennen käsitellyt ovat jo poissa,
+    # loput yritetään yksitellen. Olemassaolo tarkistetaan vain tämän erän poluista.
+    return [it for it in batch if not os.path.lexists(it[1]) or _trash_darwin([it[1]])]
+
+def clean_paths(items:Iterable[Tuple[object,str,int]], stop_flag:threading.Event, progress:Optional[CleanProgress]=None,
+                on_deleted:Optional[Callable[[list],None]]=None, batch_size:int=CLEAN_BATCH)->CleanProgress:
+    # items: (tunniste, polku, koko skannauksesta). macOS:ssä siirto Roskakoriin erissä, muualla poisto.
+    # on_deleted saa kunkin erän poistettujen tunnisteet, jotta tuloksista voi poistaa ne ilman uutta stat-kierrosta.
+    items=list(items); p=progress if progress is not None else CleanProgress()
+    p.total=len(items); p.total_bytes=sum(it[2] for it in items)
+    try:
+        for i in range(0,len(items),max(1,batch_size)):
+            if stop_flag.is_set(): p.cancelled=True; break
+            batch=items[i:i+batch_size]; gone=_clean_batch(batch)
+            p.deleted+=len(gone); p.failed+=len(batch)-len(gone); p.bytes_freed+=sum(it[2] for it in gone); p.done+=len(batch)
+            if gone and on_deleted is not None: on_deleted([it[0] for it in gone])
+    finally:
+        p.finished=True
+    return p
+
+# ---- monta juurta ----
+
+@dataclass
+class RootProgress:
+    # Yhden juuren tila monijuurisessa skannauksessa. state: odottaa | käynnissä | valmis | keskeytetty | ohitettu | virhe.
+    # Kirjoittaa vain juuren työsäie; stats on juuren omat laskurit (parentina kutsujan walk_stats).
+    root:str
+    dev:int=0
+    state:str='odottaa'
+    note:str=''
+    current:str=''
+    stats:WalkStats=field(default_factory=WalkStats)
+
+def _within(path:str, parent:str)->bool:
+    return path==parent or path.startswith(parent.rstrip(os.sep)+os.sep)
+
+def plan_roots(roots:Iterable[str], same_fs_only:bool=True, skip_hidden:bool=True,
+               walk_stats:Optional[WalkStats]=None)->Tuple[List[List[str]],Dict[str,RootProgress]]:
+    # Poistaa toistot ja juuret, jotka toinen juuri jo kattaa (sama laite tai laitteen vaihto sallittu, eikä
+    # välissä piilotettua kansiota), ja ryhmittelee loput laitteittain: ryhmät skannataan rinnakkain, saman
+    # laitteen juuret peräkkäin. Palauttaa (ryhmät, tila juurittain syöttöjärjestyksessä).
+    plan:Dict[str,RootProgress]={}; real:Dict[str,str]={}
+    for r in roots:
+        a=os.path.abspath(os.path.expanduser(r))
+        if a in plan: continue
+        p=plan[a]=RootProgress(root=a,stats=WalkStats(parent=walk_stats))
+        try:
+            p.dev=os.stat(a).st_dev
+            if not os.path.isdir(a): p.state='ohitettu'; p.note='ei kansio'; continue
+        except OSError as e:
+            p.state='ohitettu'; p.note=f'{type(e).__name__}: {e}'; continue
+        real[a]=os.path.realpath(a)
+    kept:List[str]=[]
+    for a in sorted(real,key=lambda x:len(real[x])):
+        for k in kept:
+            if not _within(real[a],real[k]): continue
+            if same_fs_only and plan[k].dev!=plan[a].dev: continue
+            rest=real[a][len(real[k]):].split(os.sep)
+            if skip_hidden and any(part.startswith('.') for part in rest): continue
+            plan[a].state='ohitettu'; plan[a].note=f'sisältyy juureen {k}'; break
+        else:
+            kept.append(a)
+    groups:Dict[int,List[str]]={}
+    for a in plan:
+        if a in kept: groups.setdefault(plan[a].dev,[]).append(a)
+    return list(groups.values()), plan
+
+def scan_roots(roots:Iterable[str], allowed_exts:Optional[List[str]], min_size_bytes:int, follow_symlinks:bool, skip_hidden:bool,
+               exclude_dirs:List[str], same_fs_only:bool, start_ts:Optional[float], end_ts:Optional[float],
+               stop_flag:threading.Event, progress_cb=None, live_queue:Optional[queue.Queue]=None,
+               exclude_substrings:Optional[List[str]]=None, workers:int=1, index_path:Optional[str]=None,
+               stats:Optional[PipelineStats]=None, batch_size:int=256, rollup:Optional[DirRollup]=None,
+               dedup_inodes:bool=True, walk_stats:Optional[WalkStats]=None, dir_timeout:Optional[float]=None,
+               progress:Optional[Dict[str,RootProgress]]=None)->Iterable[FileInfo]:
+    # Monta juurta samanaikaisesti: plan_roots ryhmittelee juuret laitteittain ja jokainen ryhmä ajetaan omassa
+    # säikeessään scan_filesillä (workers = läpikäyntisäikeet juurta kohden). Saman ryhmän juuret jakavat kovalinkkien
+    # karsinnan (seen_inodes); eri laitteiden juuret voivat mennä päällekkäin vain symlinkkejä seuratessa, jolloin
+    # yhdistäminen kutsujan säikeessä päästää saman tiedoston (st_dev, st_ino) läpi vain kerran. Muuten muistissa ei
+    # pidetä osumia. live_queue/stats/walk_stats kuten scan_filesissa; rollupin juuriksi asetetaan skannattavat
+    # juuret (sisäkkäiset pois), joten summat nousevat ulompaan juureen asti. progress (dict) saa juurikohtaiset
+    # RootProgress-tilat heti alussa. index_path: jokainen ryhmä avaa indeksiin oman yhteyden.
+    groups,plan=plan_roots(roots, same_fs_only, skip_hidden, walk_stats)
+    if progress is not None: progress.update(plan)
+    if rollup is not None: rollup.roots={r for g in groups for r in g}
+    dedup=follow_symlinks and len(groups)>1
+    index_errors:tuple=()
+    if index_path:
+        import sqlite3
+        index_errors=(sqlite3.Error,)
+    merged:queue.Queue=queue.Queue(maxsize=64)
+    halt=threading.Event(); flag=_AnyFlag(stop_flag,halt)
+    def run_root(root:str, p:RootProgress, inodes:Set[Tuple[int,int]])->Optional[DirRollup]:
+        def cb(d:str):
+            p.current=d
+            if progress_cb: progress_cb(d)
+        part=DirRollup([root]) if rollup is not None else None; index=None
+        if index_path:
+            try: index=ScanIndex(index_path)
+            except (*index_errors,OSError) as e: p.note=f'indeksi ohitettu ({e})'
+        try:
+            for _ in scan_files(root, allowed_exts, min_size_bytes, follow_symlinks, skip_hidden, exclude_dirs, same_fs_only,
+                                start_ts, end_ts, flag, cb, merged, None, exclude_substrings, workers, index, None,
+                                batch_size, part, dedup_inodes, p.stats, dir_timeout, inodes):
+                pass
+        finally:
+            if index is not None:
+                try: index.close()
+                except index_errors: pass
+                # Indeksi lukossa tai rikki kesken skannauksen: loppu käytiin läpi listaamalla
+                if index.error is not None: p.note=f'indeksi ohitettu ({index.error})'
+        return part
+    def worker(group:List[str]):
+        part=DirRollup(group) if rollup is not None else None; inodes:Set[Tuple[int,int]]=set()
+        try:
+            for root in group:
+                p=plan[root]
+                if flag.is_set(): break
+                p.state='käynnissä'
+                try:
+                    done=run_root(root, p, inodes)
+                    if part is not None and done is not None: part.merge(done)
+                    p.state='keskeytetty' if flag.is_set() else 'valmis'
+                except Exception as e:
+                    p.state='virhe'; p.note=f'{type(e).__name__}: {e}'
+        finally:
+            while not flag.is_set():
+                try: merged.put((_WALK_DONE,part),timeout=0.1); break
+                except queue.Full: continue
+    threads=[threading.Thread(target=worker,args=(g,),daemon=True) for g in groups]
+    for t in threads: t.start()
+    seen:Set=set(); running=len(threads)
+    try:
+        # Jonoa luetaan, kunnes jokainen ryhmä on kuitannut _WALK_DONE:lla; elossaolo kertoo vain kaatuneesta säikeestä,
+        # ja silloinkin jono tyhjennetään ensin (säie laittaa viimeiset eränsä jonoon ennen päättymistään)
+        while running and not stop_flag.is_set():
+            try: item=merged.get(timeout=0.1)
+            except queue.Empty:
+                if any(t.is_alive() for t in threads): continue
+                try: item=merged.get_nowait()
+                except queue.Empty: break
+            if type(item) is tuple:
+                running-=1
+                if rollup is not None and item[1] is not None: rollup.merge(item[1])
+                continue
+            if dedup:
+                fresh=[]
+                for fi in item:
+                    key=(fi.dev,fi.ino) if dedup_inodes and fi.ino else fi.path
+                    if key in seen: continue
+                    seen.add(key); fresh.append(fi)
+                item=fresh
+            if live_queue is not None:
+                if item: put_batch(live_queue, item, stop_flag, stats)
+            else:
+                yield from item
+    finally:
+        halt.set()
+
+# ---- kirjasto-API ----
+
+def default_root()->str:
+    return os.environ.get('SystemDrive','C:')+'\\' if os.name=='nt' else '/'
+
+_SIZE_UNITS={'':1,'B':1,'K':1024,'KB':1024,'M':1024**2,'MB':1024**2,'G':1024**3,'GB':1024**3,'T':1024**4,'TB':1024**4}
+
+def parse_size(s:str)->int:
+    # '500', '50M', '1.5GB' -> tavuja (1024-kantaiset yksiköt)
+    m=re.fullmatch(r'\s*([0-9]*\.?[0-9]+)\s*([A-Za-z]*)\s*',s or '')
+    if not m or m.group(2).upper() not in _SIZE_UNITS: raise ValueError(f"Tuntematon koko: {s!r}")
+    return int(float(m.group(1))*_SIZE_UNITS[m.group(2).upper()])
+
+def parse_exts(values:Iterable[str])->Optional[List[str]]:
+    # ['mov,.MP4', 'zip'] -> ['.mov', '.mp4', '.zip']; tyhjä -> None (kaikki päätteet)
+    exts=[p.strip().lower() for v in values for p in (v or '').split(',') if p.strip()]
+    return [e if e.startswith('.') else '.'+e for e in exts] or None
+
+def find_files(root:Union[str,Iterable[str],None]=None, exts:Optional[List[str]]=None, min_size:int=0, exclude:Iterable[str]=(),
+               top_n:Optional[int]=None, follow_symlinks:bool=False, skip_hidden:bool=True, same_fs_only:bool=True,
+               start_ts:Optional[float]=None, end_ts:Optional[float]=None, workers:int=1,
+               stop_flag:Optional[threading.Event]=None, progress_cb=None,
+               rollup:Optional[DirRollup]=None, walk_stats:Optional[WalkStats]=None,
+               dir_timeout:Optional[float]=None, progress:Optional[Dict[str,RootProgress]]=None)->Iterable[FileInfo]:
+    # Kirjastokäyttöön. Ilman top_n:ää osumat virtaavat heti eikä niitä pidetä muistissa;
+    # top_n:llä muistissa on korkeintaan N osumaa ja ne palautetaan lopuksi suurimmasta alkaen.
+    # rollup (DirRollup) kerää kansiokoot samasta läpikäynnistä, walk_stats telemetrian (ks. WalkStats.snapshot).
+    # root voi olla myös lista juuria: ne skannataan rinnakkain laitteittain ja yhdistetään (scan_roots), ja
+    # progress (dict) saa juurikohtaiset tilat (ohitetut ja epäonnistuneet juuret).
+    stop_flag=stop_flag or threading.Event(); exclude=[x for x in exclude if x.strip()]
+    if root is None or isinstance(root,str):
+        it=scan_files(root or default_root(), exts, min_size, follow_symlinks, skip_hidden, [], same_fs_only, start_ts, end_ts,
+                      stop_flag, progress_cb, exclude_substrings=exclude, workers=workers, rollup=rollup,
+                      walk_stats=walk_stats, dir_timeout=dir_timeout)
+    else:
+        it=scan_roots(list(root) or [default_root()], exts, min_size, follow_symlinks, skip_hidden, [], same_fs_only, start_ts, end_ts,
+                      stop_flag, progress_cb, exclude_substrings=exclude, workers=workers, rollup=rollup,
+                      walk_stats=walk_stats, dir_timeout=dir_timeout, progress=progress)
+    if top_n is None:
+        yield from it; return
+    top=TopN(top_n)
+    for fi in it: top.add(fi)
+    yield from top.items()
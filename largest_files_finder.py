@@ -12,13 +12,63 @@ Perii v5.2:n parannukset (TimeoutError-kesto, Poissulje polut, lajittelu, värip
 
 import os
 import sys
+import time
+_T0=time.perf_counter()  # käynnistysajan mittauksen nollakohta
 import threading
-import traceback
 import queue
-import subprocess
-from dataclasses import dataclass
-from typing import List, Optional, Iterable, Tuple, Callable, Set, Dict
-from datetime import datetime, timedelta
+from typing import List, Optional, Dict
+
+# Komentoriviargumenteilla ajetaan ilman käyttöliittymää (macOS:n -psn_-argumentti ei laske). Ohjataan ennen
+# tkinterin ja käyttöliittymän latausta, joten CLI käynnistyy nopeasti ja toimii myös ilman tkinteriä.
+if __name__=='__main__' and len(sys.argv)>1 and not sys.argv[1].startswith('-psn'):
+    from finder_cli import main
+    sys.exit(main())
+
+from finder_core import (SAFE, CAUTION, SYSTEM, STATUS_META, STATUS_CODES, DEFAULT_WORKERS, FileInfo, human_size,
+                         TopN, ResultStore, ResultView, PipelineStats, WalkStats, DirRollup, RootProgress, CleanProgress,
+                         clean_paths, scan_roots, default_index_path, default_root, parse_exts)
+
+DEFAULT_EXTS=".mov,.mp4,.mkv,.zip,.dmg,.pkg"; DEFAULT_MIN_MB=50; DEFAULT_TOP_N=200
+FIRST_RESULT_BUDGET_MS=1500  # esiskannauksella: käynnistyksestä ensimmäiseen tulokseen ikkunassa
+
+def default_excludes()->List[str]:
+    return [os.path.expanduser('~/Library/CloudStorage'), os.path.expanduser('~/Library/Mobile Documents'), '/Volumes', 'OneDriveCloudTemp']
+
+class ScanJob:
+    # Yksi skannaus taustasäikeessä. Ei riipu tkinteristä, joten esiskannaus voidaan aloittaa ennen ikkunaa;
+    # App lukee jonon ja tilat pääsäikeessä (drain) ja huomaa valmistumisen done-tapahtumasta.
+    def __init__(self, roots:List[str], params:dict, top_n:int, rollup:bool=True):
+        self.roots=roots; self.params=params; self.top_n=top_n
+        self.stop_flag=threading.Event(); self.done=threading.Event(); self.error:Optional[Exception]=None
+        self.live_q:queue.Queue=queue.Queue(maxsize=64); self.pipe_stats=PipelineStats(); self.walk_stats=WalkStats()
+        self.root_progress:Dict[str,RootProgress]={}; self.progress_dir=roots[0]
+        self.rollup=DirRollup([os.path.expanduser(r) for r in roots]) if rollup else None
+        self.started=time.perf_counter()
+    def start(self)->'ScanJob':
+        threading.Thread(target=self._run,daemon=True).start(); return self
+    def _progress(self, d:str): self.progress_dir=d  # skannaussäie vain tallettaa kansion
+    def _run(self):
+        # Jokainen juuri (laitteittain rinnakkain) avaa indeksiin oman yhteyden omassa säikeessään
+        try:
+            for _ in scan_roots(self.roots, stop_flag=self.stop_flag, progress_cb=self._progress, live_queue=self.live_q,
+                                stats=self.pipe_stats, rollup=self.rollup, walk_stats=self.walk_stats,
+                                progress=self.root_progress, **self.params):
+                pass
+        except Exception as ex:
+            import traceback
+            traceback.print_exc(); self.error=ex
+        finally:
+            self.done.set()
+
+def prescan_job()->ScanJob:
+    # Koko koneen skannaus lomakkeen oletusasetuksilla; käynnistetään ennen tkinterin latausta ja ikkunan rakentamista
+    params=dict(allowed_exts=parse_exts([DEFAULT_EXTS]), min_size_bytes=DEFAULT_MIN_MB*1024*1024, follow_symlinks=False,
+                skip_hidden=True, exclude_dirs=[], same_fs_only=True, start_ts=None, end_ts=None,
+                exclude_substrings=default_excludes(), workers=DEFAULT_WORKERS, index_path=default_index_path())
+    return ScanJob([default_root()], params, DEFAULT_TOP_N).start()
+
+# LFF_PRESCAN=1: oletusjuuren läpikäynti alkaa heti, tulokset näytetään kun ikkuna on valmis
+_PRESCAN=prescan_job() if __name__=='__main__' and os.environ.get('LFF_PRESCAN')=='1' else None
 
 try:
     import tkinter as tk
@@ -27,187 +77,33 @@ except Exception as e:
     print("Tkinter vaaditaan tämän sovelluksen ajamiseen.")
     raise
 
-SAFE='safe'; CAUTION='caution'; SYSTEM='system'
-STATUS_META={SAFE:{'label':'🟢 Turvallinen','dot':'●','color':'#2ecc71'},CAUTION:{'label':'🟡 Harkittava','dot':'●','color':'#f1c40f'},SYSTEM:{'label':'🔴 Järjestelmä','dot':'●','color':'#e74c3c'}}
-SYSTEM_ROOT_PREFIXES=['/System','/Library','/usr','/bin','/sbin','/private','/opt','/Applications']
-SAFE_PATTERNS=['/target/','/deps/','/incremental/','/build/','.rlib','.rmeta','.d',
-               os.path.expanduser('~/.npm'),os.path.expanduser('~/.cache/yarn'),os.path.expanduser('~/.cache/pnpm'),
-               os.path.expanduser('~/.cargo/registry'),os.path.expanduser('~/.cargo/git'),
-               os.path.expanduser('~/Library/Developer/Xcode/DerivedData'),
-               os.path.expanduser('~/Library/Developer/CoreSimulator'),
-               os.path.expanduser('~/Library/Caches')]
-
-@dataclass
-class FileInfo:
-    path: str
-    size: int
-    created_ts: float
-    @property
-    def dirname(self)->str: return os.path.dirname(self.path)
-    @property
-    def basename(self)->str: return os.path.basename(self.path)
-    @property
-    def created_str(self)->str:
-        try: return datetime.fromtimestamp(self.created_ts).strftime('%Y-%m-%d %H:%M')
-        except Exception: return '-'
-
-def human_size(n:int)->str:
-    if n<0: return '-'
-    units=["B","KB","MB","GB","TB","PB"]; i=0; f=float(n)
-    while f>=1024.0 and i<len(units)-1:
-        f/=1024.0; i+=1
-    return f"{int(round(f))} {units[i]}" if i<=1 else f"{f:.2f} {units[i]}"
-
-def get_created_ts(st)->float:
-    ts=getattr(st,'st_birthtime',None)
-    if ts is None: ts=st.st_ctime
-    return float(ts)
-
-def ext_matches(path:str,allowed_exts:Optional[List[str]])->bool:
-    if not allowed_exts: return True
-    return os.path.splitext(path)[1].lower() in allowed_exts
-
-def in_date_range(ts:float,start_ts:Optional[float],end_ts:Optional[float])->bool:
-    if start_ts is not None and ts<start_ts: return False
-    if end_ts is not None and ts>end_ts: return False
-    return True
-
-def is_excluded_path(path:str, exclude_substrings:List[str])->bool:
-    p=os.path.abspath(path)
-    for sub in exclude_substrings:
-        sub=sub.strip()
-        if not sub: continue
-        try:
-            sub_exp=os.path.abspath(os.path.expanduser(sub)) if sub.startswith('~') or sub.startswith('/') else sub
-            if sub.startswith('/') or sub.startswith('~'):
-                if p.startswith(sub_exp): return True
-            else:
-                if sub in p: return True
-        except Exception:
-            pass
-    return False
-
-def iter_tree(root:str, follow_symlinks:bool, skip_hidden:bool, exclude_dirs:List[str], same_fs_only:bool,
-              progress_cb:Optional[Callable[[str],None]], stop_flag:threading.Event,
-              exclude_substrings:List[str]):
-    try:
-        root_dev=os.stat(root).st_dev if same_fs_only else None
-    except Exception:
-        root_dev=None
-    stack=[root]; last_progress=0
-    while stack and not stop_flag.is_set():
-        d=stack.pop()
-        if is_excluded_path(d, exclude_substrings):
-            continue
-        try:
-            with os.scandir(d) as it:
-                while True:
-                    if stop_flag.is_set(): break
-                    try:
-                        entry=next(it)
-                    except StopIteration:
-                        break
-                    except (TimeoutError,OSError):
-                        break
-                    try:
-                        name=entry.name
-                        if skip_hidden and name.startswith('.'): continue
-                        full=entry.path
-                        if is_excluded_path(full, exclude_substrings):
-                            continue
-                        if entry.is_dir(follow_symlinks=follow_symlinks):
-                            if name in exclude_dirs: continue
-                            if same_fs_only and root_dev is not None:
-                                try:
-                                    if os.stat(full, follow_symlinks=False).st_dev!=root_dev:
-                                        continue
-                                except Exception:
-                                    continue
-                            stack.append(full)
-                        else:
-                            yield full
-                    except (PermissionError,FileNotFoundError,TimeoutError,OSError):
-                        continue
-        except (PermissionError,FileNotFoundError,TimeoutError,OSError):
-            pass
-        if progress_cb:
-            from time import time as _now
-            t=_now()
-            if t-last_progress>0.25:
-                last_progress=t
-                try: progress_cb(d)
-                except Exception: pass
-
-def scan_files(root:str, allowed_exts:Optional[List[str]], min_size_bytes:int, follow_symlinks:bool, skip_hidden:bool,
-               exclude_dirs:List[str], same_fs_only:bool, start_ts:Optional[float], end_ts:Optional[float],
-               stop_flag:threading.Event, progress_cb=None, live_queue:Optional[queue.Queue]=None,
-               seen_paths:Optional[Set[str]]=None, exclude_substrings:Optional[List[str]]=None)->Iterable[FileInfo]:
-    exclude_substrings = exclude_substrings or []
-    for path in iter_tree(root, follow_symlinks, skip_hidden, exclude_dirs, same_fs_only, progress_cb, stop_flag, exclude_substrings):
-        try:
-            norm=os.path.abspath(path)
-            if seen_paths is not None and norm in seen_paths: continue
-            if not ext_matches(path, allowed_exts): continue
-            st=os.stat(path, follow_symlinks=follow_symlinks)
-            size=st.st_size
-            if size<min_size_bytes: continue
-            cts=get_created_ts(st)
-            if not in_date_range(cts,start_ts,end_ts): continue
-            fi=FileInfo(path=path,size=size,created_ts=cts)
-            if live_queue is not None:
-                if seen_paths is not None: seen_paths.add(norm)
-                try: live_queue.put_nowait(fi)
-                except queue.Full: pass
-            else:
-                yield fi
-        except (PermissionError,FileNotFoundError,TimeoutError,OSError):
-            continue
-
-# ---- luokittelu ----
-
-def classify_path(path:str)->Tuple[str,str]:
-    apath=os.path.abspath(path)
-    for pfx in SYSTEM_ROOT_PREFIXES:
-        try:
-            if apath.startswith(pfx+os.sep) or apath==pfx:
-                return SYSTEM, f'Järjestelmäpolku: {pfx}'
-        except Exception: pass
-    for patt in SAFE_PATTERNS:
-        try:
-            if patt.startswith(os.path.sep) or patt.startswith('~'):
-                if apath.startswith(os.path.abspath(os.path.expanduser(patt))):
-                    return SAFE, f'Välimuisti/build-artefakti: {patt}'
-            else:
-                if patt in apath: return SAFE, f'Build-väliaikainen: *{patt}*'
-        except Exception: pass
-    name=os.path.basename(apath).lower()
-    if any(name.endswith(ext) for ext in ('.mov','.mp4','.mkv','.zip','.dmg','.pkg','.iso')): return CAUTION,'Iso käyttäjätiedosto/paketti'
-    if '/Downloads/' in apath: return CAUTION,'Lataukset-kansio'
-    return CAUTION,'Tuntematon (tarkista ennen poistoa)'
-
 # ---- app ----
 class App(tk.Tk):
-    def __init__(self):
+    def __init__(self, prescan:Optional[ScanJob]=None):
         super().__init__()
         self.title("Largest Files Finder v5.2.1")
         self.geometry("1350x880")
-        self.stop_flag=threading.Event(); self.scan_thread=None
-        self.results:List[FileInfo]=[]; self.live_q=None; self.seen_paths:set=set()
+        self.job:Optional[ScanJob]=None; self.stop_flag=threading.Event(); self.first_result_since=0.0; self.first_result_ms:Optional[float]=None
+        self.live_q=None; self.rollup=None; self.root_progress:dict={}; self.topn=TopN(DEFAULT_TOP_N); self.pipe_stats=PipelineStats(); self.walk_stats=WalkStats()
+        self.clean_stop=threading.Event(); self.clean_q=None; self.clean_progress=None
         self.sort_col=None; self.sort_desc=False
+        self.store=ResultStore(); self.view=ResultView(self.store); self.view_top=0; self.sel_path:Optional[str]=None
         self.build_ui()
+        if prescan is not None: self.attach_scan(prescan,since=_T0)
 
     def build_ui(self):
-        nb=ttk.Notebook(self); self.files_tab=ttk.Frame(nb); self.sys_tab=ttk.Frame(nb)
-        nb.add(self.files_tab,text='Tiedostot'); nb.add(self.sys_tab,text='Järjestelmä / "Muut taltiot"'); nb.pack(fill=tk.BOTH,expand=True)
+        nb=ttk.Notebook(self); self.files_tab=ttk.Frame(nb); self.dirs_tab=ttk.Frame(nb); self.sys_tab=ttk.Frame(nb)
+        nb.add(self.files_tab,text='Tiedostot'); nb.add(self.dirs_tab,text='Kansiot'); nb.add(self.sys_tab,text='Järjestelmä / "Muut taltiot"'); nb.pack(fill=tk.BOTH,expand=True)
         # Files tab
         top=ttk.Frame(self.files_tab); top.pack(fill=tk.X,padx=10,pady=6)
-        ttk.Label(top,text="Juuri (tyhjä = koko kone):").pack(side=tk.LEFT)
+        ttk.Label(top,text=f"Juuret (erotin {os.pathsep} , tyhjä = koko kone):").pack(side=tk.LEFT)
         self.root_var=tk.StringVar(value=""); ttk.Entry(top,textvariable=self.root_var).pack(side=tk.LEFT,fill=tk.X,expand=True,padx=6)
         ttk.Button(top,text="Valitse kansio…",command=self.choose_root).pack(side=tk.LEFT)
+        ttk.Button(top,text="Lisää kansio…",command=lambda:self.choose_root(add=True)).pack(side=tk.LEFT,padx=(6,0))
         ttk.Button(top,text="Tyhjennä",command=lambda:self.root_var.set("")).pack(side=tk.LEFT,padx=(6,0))
 
         filt=ttk.Frame(self.files_tab); filt.pack(fill=tk.X,padx=10,pady=4)
-        self.ext_var=tk.StringVar(value=".mov,.mp4,.mkv,.zip,.dmg,.pkg"); self.min_mb_var=tk.StringVar(value="50"); self.topn_var=tk.StringVar(value="200")
+        self.ext_var=tk.StringVar(value=DEFAULT_EXTS); self.min_mb_var=tk.StringVar(value=str(DEFAULT_MIN_MB)); self.topn_var=tk.StringVar(value=str(DEFAULT_TOP_N))
         self.skip_hidden_var=tk.BooleanVar(value=True); self.follow_links_var=tk.BooleanVar(value=False); self.same_fs_only_var=tk.BooleanVar(value=True)
         ttk.Label(filt,text="Tiedostopäätteet (pilkuin):").grid(row=0,column=0,sticky=tk.W)
         ttk.Entry(filt,textvariable=self.ext_var,width=40).grid(row=0,column=1,sticky=tk.W,padx=6)
@@ -218,11 +114,20 @@ class App(tk.Tk):
         ttk.Checkbutton(filt,text="Ohita piilotetut",variable=self.skip_hidden_var).grid(row=1,column=0,sticky=tk.W,pady=4)
         ttk.Checkbutton(filt,text="Seuraa symlinkkejä",variable=self.follow_links_var).grid(row=1,column=1,sticky=tk.W,pady=4)
         ttk.Checkbutton(filt,text="Vain sama tiedostojärjestelmä",variable=self.same_fs_only_var).grid(row=1,column=2,sticky=tk.W,pady=4)
+        self.workers_var=tk.StringVar(value=str(DEFAULT_WORKERS))
+        ttk.Label(filt,text="Säikeet:").grid(row=1,column=4,sticky=tk.E)
+        ttk.Entry(filt,textvariable=self.workers_var,width=8).grid(row=1,column=5,sticky=tk.W,padx=6)
+        self.use_index_var=tk.BooleanVar(value=True)
+        ttk.Checkbutton(filt,text="Käytä indeksiä (nopea uudelleenskannaus)",variable=self.use_index_var).grid(row=1,column=3,sticky=tk.W,pady=4)
+        self.rollup_var=tk.BooleanVar(value=True)
+        ttk.Checkbutton(filt,text="Laske kansioiden koot kaikista tiedostoista (Kansiot-välilehti)",variable=self.rollup_var).grid(row=2,column=0,columnspan=2,sticky=tk.W)
+        self.dir_timeout_var=tk.StringVar(value="")
+        ttk.Label(filt,text="Kansion aikaraja (s, tyhjä = ei):").grid(row=2,column=4,sticky=tk.E)
+        ttk.Entry(filt,textvariable=self.dir_timeout_var,width=8).grid(row=2,column=5,sticky=tk.W,padx=6)
 
         excl=ttk.Frame(self.files_tab); excl.pack(fill=tk.X,padx=10,pady=4)
         ttk.Label(excl,text="Poissulje polut (pilkuin, osuma mihin tahansa polkuun):").grid(row=0,column=0,sticky=tk.W)
-        default_excl=",".join([os.path.expanduser('~/Library/CloudStorage'), os.path.expanduser('~/Library/Mobile Documents'), '/Volumes', 'OneDriveCloudTemp'])
-        self.exclude_substrings_var=tk.StringVar(value=default_excl)
+        self.exclude_substrings_var=tk.StringVar(value=",".join(default_excludes()))
         ttk.Entry(excl,textvariable=self.exclude_substrings_var).grid(row=0,column=1,sticky=tk.W,padx=6)
 
         datef=ttk.Frame(self.files_tab); datef.pack(fill=tk.X,padx=10,pady=4)
@@ -240,6 +145,7 @@ class App(tk.Tk):
         ttk.Label(statusf,text=" | Smart Clean kynnys (MB):").pack(side=tk.LEFT,padx=(16,4))
         self.clean_threshold_mb=tk.StringVar(value="100"); ttk.Entry(statusf,textvariable=self.clean_threshold_mb,width=6).pack(side=tk.LEFT)
         ttk.Button(statusf,text="Siivoa turvalliset (Roskakori)",command=self.smart_clean).pack(side=tk.LEFT,padx=(10,0))
+        self.clean_stop_btn=ttk.Button(statusf,text="Pysäytä siivous",command=self.stop_clean,state=tk.DISABLED); self.clean_stop_btn.pack(side=tk.LEFT,padx=(6,0))
 
         actions=ttk.Frame(self.files_tab); actions.pack(fill=tk.X,padx=10,pady=6)
         ttk.Button(actions,text="Skannaa",command=self.start_scan).pack(side=tk.LEFT)
@@ -247,6 +153,7 @@ class App(tk.Tk):
         self.reveal_btn=ttk.Button(actions,text="Näytä Finderissa",command=self.reveal_selected,state=tk.DISABLED); self.reveal_btn.pack(side=tk.LEFT,padx=(12,0))
 
         self.status_var=tk.StringVar(value="Valmis."); ttk.Label(self.files_tab,textvariable=self.status_var).pack(fill=tk.X,padx=10)
+        self.telemetry_var=tk.StringVar(value=""); ttk.Label(self.files_tab,textvariable=self.telemetry_var,foreground='#666').pack(fill=tk.X,padx=10)
 
         cols=("status","name","dir","size","created")
         self.tree=ttk.Treeview(self.files_tab,columns=cols,show='headings')
@@ -262,19 +169,36 @@ class App(tk.Tk):
         self.tree.column("created",width=120,anchor=tk.W)
         self.tree.pack(fill=tk.BOTH,expand=True,padx=10,pady=8)
         self.tree.bind("<Double-1>",lambda e:self.reveal_selected())
-        ttk.Scrollbar(self.tree,orient='vertical',command=self.tree.yview).pack(side='right',fill='y')
-        self.filtered_indices:List[int]=[]
+        # Virtuaalinen vieritys: puussa on vain näkyvän ikkunan verran rivejä, vierityspalkki osoittaa näkymämalliin
+        self.vsb=ttk.Scrollbar(self.tree,orient='vertical',command=self.on_scroll); self.vsb.pack(side='right',fill='y')
+        self.tree.bind("<Configure>",lambda e:self.render_rows())
+        self.tree.bind("<<TreeviewSelect>>",self.on_select)
+        for seq in ("<MouseWheel>","<Button-4>","<Button-5>"): self.tree.bind(seq,self.on_wheel)
+        self.row_cache:Dict[str,tuple]={}
+
+        # Dirs tab: suurimmat kansiot koon mukaan (Top N), täytetään skannauksen lopuksi
+        self.dirs_status_var=tk.StringVar(value="Kansiokoot lasketaan skannauksen yhteydessä.")
+        ttk.Label(self.dirs_tab,textvariable=self.dirs_status_var).pack(fill=tk.X,padx=10,pady=(8,0))
+        self.dirs_tree=ttk.Treeview(self.dirs_tab,columns=("dir","size","files"),show='headings')
+        self.dirs_tree.heading("dir",text="Kansio"); self.dirs_tree.heading("size",text="Koko yhteensä"); self.dirs_tree.heading("files",text="Tiedostoja")
+        self.dirs_tree.column("dir",width=900,anchor=tk.W); self.dirs_tree.column("size",width=140,anchor=tk.E); self.dirs_tree.column("files",width=120,anchor=tk.E)
+        self.dirs_tree.pack(fill=tk.BOTH,expand=True,padx=10,pady=8)
+        self.dirs_tree.bind("<Double-1>",lambda e:self.reveal_path(self.dirs_tree.selection()[0] if self.dirs_tree.selection() else None))
+        ttk.Scrollbar(self.dirs_tree,orient='vertical',command=self.dirs_tree.yview).pack(side='right',fill='y')
 
         ttk.Label(self.sys_tab,text="APFS snapshotit ja välimuistit käsitellään täällä (v5:stä tutut toiminnot).",wraplength=900,justify='left').pack(anchor='w',padx=10,pady=10)
 
     # ------- helpers & actions -------
-    def choose_root(self):
-        d=filedialog.askdirectory(initialdir=self.root_var.get() or os.path.expanduser('~'))
-        if d: self.root_var.set(d)
+    def choose_root(self, add:bool=False):
+        roots=self.parse_roots()
+        d=filedialog.askdirectory(initialdir=(roots[-1] if roots else os.path.expanduser('~')))
+        if d: self.root_var.set(os.pathsep.join(roots+[d]) if add else d)
+    def parse_roots(self)->list: return [r.strip() for r in (self.root_var.get() or '').split(os.pathsep) if r.strip()]
     def set_status(self,txt:str): self.status_var.set(txt); self.update_idletasks()
     def parse_date(self,s:str)->Optional[float]:
         s=(s or '').strip();
         if not s: return None
+        from datetime import datetime
         try: return datetime.strptime(s,'%Y-%m-%d').timestamp()
         except ValueError:
             messagebox.showerror('Virhe',f"Päivämäärä '{s}' ei ole muodossa YYYY-MM-DD."); return None
@@ -282,152 +206,250 @@ class App(tk.Tk):
         if getattr(self,'sort_col',None)==col: self.sort_desc=not self.sort_desc
         else:
             self.sort_col=col; self.sort_desc=(col in ('size','created'))
-        self.refresh_tree_filter()
+        self.view.set_sort(self.sort_col,self.sort_desc); self.view_top=0
+        self.render_rows()
 
     def start_scan(self):
-        root=self.root_var.get().strip() or ('/' if sys.platform=='darwin' else os.environ.get('SystemDrive','C:')+'\\' )
-        if not os.path.isdir(root):
-            messagebox.showerror('Virhe','Valitse kelvollinen juurikansio tai jätä tyhjäksi koko koneelle.'); return
-        allowed_exts=[e if e.startswith('.') else '.'+e for e in [p.strip().lower() for p in (self.ext_var.get() or '').split(',') if p.strip()]]
+        if self.clean_progress is not None and not self.clean_progress.finished:
+            # Siivoussäie viittaa nykyisen varaston riveihin
+            messagebox.showinfo('Smart Clean','Odota, että siivous valmistuu tai pysäytä se.'); return
+        roots=self.parse_roots() or [default_root()]
+        bad=[r for r in roots if not os.path.isdir(os.path.expanduser(r))]
+        if bad:
+            messagebox.showerror('Virhe','Valitse kelvolliset juurikansiot tai jätä tyhjäksi koko koneelle.\n\n'+'\n'.join(bad)); return
+        allowed_exts=parse_exts([self.ext_var.get()])
         try: min_mb=float(self.min_mb_var.get().strip() or 0)
         except ValueError: messagebox.showerror('Virhe','Minimikoko (MB) ei ole numero.'); return
         min_size_bytes=int(min_mb*1024*1024)
-        try: int(self.topn_var.get().strip() or 200)
+        try: top_n=int(self.topn_var.get().strip() or DEFAULT_TOP_N)
         except ValueError: messagebox.showerror('Virhe','Top N ei ole kokonaisluku.'); return
+        try: workers=max(1,int(self.workers_var.get().strip() or DEFAULT_WORKERS))
+        except ValueError: messagebox.showerror('Virhe','Säikeet ei ole kokonaisluku.'); return
+        try: dir_timeout=float(self.dir_timeout_var.get().strip() or 0) or None
+        except ValueError: messagebox.showerror('Virhe','Kansion aikaraja ei ole numero.'); return
         s=self.parse_date(self.start_date_var.get());
         if s is None and self.start_date_var.get().strip(): return
         e=self.parse_date(self.end_date_var.get());
         if e is None and self.end_date_var.get().strip(): return
         if e is not None: e=e+86399.0
         exclude_substrings=[x.strip() for x in (self.exclude_substrings_var.get() or '').split(',') if x.strip()]
-
-        self.results=[]; self.seen_paths.clear(); self.tree.delete(*self.tree.get_children())
-        self.stop_btn.config(state=tk.NORMAL); self.reveal_btn.config(state=tk.DISABLED)
-        self.stop_flag.clear(); self.live_q=queue.Queue(maxsize=5000)
-
-        def progress_cb(dirpath): self.set_status(f"Skannataan: {dirpath}")
-        def run():
-            try:
-                for _ in scan_files(root, allowed_exts or None, min_size_bytes, self.follow_links_var.get(), self.skip_hidden_var.get(), [], self.same_fs_only_var.get(), s, e, self.stop_flag, progress_cb, self.live_q, self.seen_paths, exclude_substrings):
-                    if self.stop_flag.is_set(): break
-            except Exception as ex:
-                traceback.print_exc(); messagebox.showerror('Virhe',f"Skannaus epäonnistui:\n{ex}")
-            finally:
-                self.after(0,self.finish_scan)
-        def drain():
-            if self.live_q is None: return
-            processed=0
-            try:
-                while processed<200 and self.live_q is not None:
-                    fi=self.live_q.get_nowait()
-                    if not any(x.path==fi.path for x in self.results): self.results.append(fi)
-                    processed+=1
-            except queue.Empty:
-                pass
-            self.refresh_tree_filter(live_append=True)
-            if not self.stop_flag.is_set() or (self.live_q and not self.live_q.empty()): self.after(60,drain)
-        self.after(120,drain)
-        threading.Thread(target=run,daemon=True).start(); self.set_status('Skannaus käynnissä…')
+        params=dict(allowed_exts=allowed_exts, min_size_bytes=min_size_bytes, follow_symlinks=self.follow_links_var.get(),
+                    skip_hidden=self.skip_hidden_var.get(), exclude_dirs=[], same_fs_only=self.same_fs_only_var.get(),
+                    start_ts=s, end_ts=e, exclude_substrings=exclude_substrings, workers=workers,
+                    index_path=default_index_path() if self.use_index_var.get() else None, dir_timeout=dir_timeout)
+        if self.job is not None and not self.job.done.is_set(): self.job.stop_flag.set()
+        self.attach_scan(ScanJob(roots, params, top_n, self.rollup_var.get()).start())
+
+    def attach_scan(self, job:ScanJob, since:Optional[float]=None):
+        # Liittää näkymään käynnissä olevan skannauksen; since = ensimmäisen tuloksen ajanoton alku (esiskannauksella
+        # prosessin käynnistys, muuten skannauksen aloitus)
+        self.job=job; self.first_result_since=job.started if since is None else since; self.first_result_ms=None
+        self.stop_flag=job.stop_flag; self.live_q=job.live_q; self.pipe_stats=job.pipe_stats; self.walk_stats=job.walk_stats
+        self.rollup=job.rollup; self.root_progress=job.root_progress
+        self.topn=TopN(job.top_n); self.view.clear(); self.store.clear(); self.view_top=0; self.sel_path=None; self.render_rows()
+        self.stop_btn.config(state=tk.NORMAL); self.reveal_btn.config(state=tk.DISABLED); self.dirs_tree.delete(*self.dirs_tree.get_children())
+        self.after(60 if since is not None else 120,self.drain,job); self.set_status('Skannaus käynnissä…')
+
+    def drain(self, job:ScanJob):
+        if self.job is not job or self.live_q is None: return
+        if job.done.is_set(): self.finish_scan(); return  # finish_scan tyhjentää jonon loppuun
+        self.drain_live(0.03)
+        st=self.pipe_stats
+        where=job.progress_dir if len(self.root_progress)<=1 else self.roots_text()
+        self.status_var.set(f"Skannataan: {where} — {st.produced} osumaa ({st.produced_per_s:.0f}/s), jonossa {st.depth} erää")
+        self.telemetry_var.set(self.telemetry_text())
+        self.after(60,self.drain,job)
+
+    def drain_live(self, budget_s:Optional[float]=None):
+        # Kuluttaja: siirtää valmiit erät Top N:ään ja näkymään; budget_s rajaa yhden tickin työn
+        if self.live_q is None: return
+        t0=time.perf_counter(); changed=False
+        while budget_s is None or time.perf_counter()-t0<budget_s:
+            try: batch=self.live_q.get_nowait()
+            except queue.Empty: break
+            for fi in batch:
+                if not self.topn.accepts(fi.size): self.topn.drop(fi.size); continue
+                rid=self.store.add(fi); _,evicted=self.topn.push_sized(fi.size,rid)
+                if evicted is not None: self.view.remove(evicted); self.store.remove(evicted)
+                self.view.add(rid); changed=True
+            self.pipe_stats.consumed+=len(batch)
+        if changed:
+            self.render_rows()
+            if self.first_result_ms is None:
+                self.update_idletasks(); self.first_result_ms=(time.perf_counter()-self.first_result_since)*1000
+                if self.first_result_since==_T0 and self.first_result_ms>FIRST_RESULT_BUDGET_MS:
+                    print(f"Ensimmäinen tulos {self.first_result_ms:.0f} ms käynnistyksestä, yli rajan {FIRST_RESULT_BUDGET_MS} ms",file=sys.stderr)
 
     def finish_scan(self):
+        self.drain_live()
         self.live_q=None; self.stop_btn.config(state=tk.DISABLED)
-        self.refresh_tree_filter(); self.set_status(f"Valmis. Näytetään {len(self.filtered_indices)} tiedostoa.")
-        self.reveal_btn.config(state=(tk.NORMAL if self.results else tk.DISABLED))
+        if self.job is not None and self.job.error is not None:
+            messagebox.showerror('Virhe',f"Skannaus epäonnistui:\n{self.job.error}")
+        self.refresh_tree_filter()
+        msg=f"Valmis. Näytetään {len(self.view)} tiedostoa."
+        if self.topn.dropped_count: msg+=f" Top N:n ulkopuolelle jäi {self.topn.dropped_count} tiedostoa ({human_size(self.topn.dropped_bytes)})."
+        ws=self.walk_stats; msg+=f" {ws.dirs} kansiota, {ws.syscalls} järjestelmäkutsua ({ws.scandir_calls} scandir, {ws.stat_calls} stat)."
+        if ws.timed_out: msg+=f" Aikaraja ylittyi {len(ws.timed_out)} kansiossa (ohitettu)."
+        odd=[p for p in self.root_progress.values() if p.state in ('ohitettu','virhe')]
+        if odd: msg+=" Juuret: "+'; '.join(f"{p.root} {p.state}"+(f" ({p.note})" if p.note else '') for p in odd)+"."
+        if self.first_result_ms is not None: msg+=f" Ensimmäinen tulos {self.first_result_ms:.0f} ms."
+        self.telemetry_var.set(self.telemetry_text())
+        self.set_status(msg)
+        self.reveal_btn.config(state=(tk.NORMAL if self.view.total else tk.DISABLED))
+        self.show_dir_totals()
+
+    def roots_text(self)->str:
+        # Juurikohtainen edistyminen monijuurisessa skannauksessa
+        parts=[]
+        for p in list(self.root_progress.values()):
+            if p.state=='käynnissä': parts.append(f"{p.root}: {p.stats.files} tiedostoa")
+            else: parts.append(f"{p.root}: {p.state}"+(f" ({p.note})" if p.note else ''))
+        return '; '.join(parts)
+
+    def telemetry_text(self)->str:
+        ws=self.walk_stats
+        txt=(f"{ws.dirs} kansiota ({ws.dirs_per_s:.0f}/s), {ws.files} tiedostoa ({ws.files_per_s:.0f}/s), "
+             f"nähty {human_size(ws.bytes_seen)}, kansiojonossa {ws.queue_depth}")
+        if ws.errors: txt+=" — virheet: "+", ".join(f"{k} {n}" for k,n in sorted(ws.errors.items()))
+        slow=ws.slowest()
+        if slow: txt+=f" — hitain: {slow[0][0]} ({slow[0][1]:.2f} s)"
+        return txt
+
+    def show_dir_totals(self):
+        if self.rollup is None: return
+        self.dirs_tree.delete(*self.dirs_tree.get_children())
+        for dt in self.rollup.top(self.topn.n):
+            self.dirs_tree.insert('',tk.END,iid=dt.path,values=(dt.path,human_size(dt.size),dt.files))
+        self.dirs_status_var.set(f"Kaikki tiedostot suodattimista riippumatta: {self.rollup.total_files} tiedostoa, {human_size(self.rollup.total_size)}. Näytetään {self.topn.n} suurinta kansiota.")
 
     def stop_scan(self): self.stop_flag.set(); self.set_status('Pysäytetään…')
+    def stop_clean(self): self.clean_stop.set(); self.set_status('Pysäytetään siivousta…')
 
     def refresh_tree_filter(self, live_append:bool=False):
-        idx=[]
-        for i,fi in enumerate(self.results):
-            status,_=classify_path(fi.path)
-            if status==SAFE and not self.show_safe.get(): continue
-            if status==CAUTION and not self.show_caution.get(): continue
-            if status==SYSTEM and not self.show_system.get(): continue
-            idx.append(i)
-        col=self.sort_col; desc=self.sort_desc
-        if col:
-            def key(k):
-                f=self.results[k]
-                if col=='status': return {SAFE:0,CAUTION:1,SYSTEM:2}[classify_path(f.path)[0]]
-                if col=='name': return f.basename.lower()
-                if col=='dir': return f.dirname.lower()
-                if col=='size': return f.size
-                if col=='created': return f.created_ts
-                return 0
-            idx.sort(key=key, reverse=desc)
-        self.filtered_indices=idx
-        self.tree.delete(*self.tree.get_children())
-        for i in self.filtered_indices:
-            f=self.results[i]; s,_=classify_path(f.path); meta=STATUS_META[s]
-            self.tree.insert('',tk.END, values=(f"{meta['dot']} {meta['label']}", f.basename, f.dirname, human_size(f.size), f.created_str))
-        if not live_append: self.set_status(f"Näytetään {len(self.filtered_indices)} tiedostoa.")
+        visible={st for st,var in ((SAFE,self.show_safe),(CAUTION,self.show_caution),(SYSTEM,self.show_system)) if var.get()}
+        self.view.set_visible(visible)
+        self.render_rows()
+        if not live_append: self.set_status(f"Näytetään {len(self.view)} tiedostoa.")
+
+    # ------- virtuaalinen rivinäkymä -------
+    def visible_rows(self)->int:
+        h=self.tree.winfo_height()
+        if h<=1: return 40
+        try: rh=int(ttk.Style().lookup('Treeview','rowheight') or 20)
+        except (ValueError,tk.TclError): rh=20
+        return max(1,h//rh-1)
+
+    def row_values(self, f:FileInfo)->tuple:
+        meta=STATUS_META[f.status]
+        return (f"{meta['dot']} {meta['label']}", f.basename, f.dirname, human_size(f.size), f.created_str)
+
+    def render_rows(self):
+        # Päivittää vain näkyvän ikkunan rivit, ja niistäkin vain ne joiden arvot muuttuivat
+        n=len(self.view); h=self.visible_rows()
+        self.view_top=max(0,min(self.view_top,n-h))
+        want=min(h,n-self.view_top)
+        children=self.tree.get_children()
+        if len(children)>want:
+            self.tree.delete(*children[want:])
+            for iid in children[want:]: self.row_cache.pop(iid,None)
+        for _ in range(len(children),want): self.tree.insert('',tk.END,values=())
+        sel=None
+        for k,iid in enumerate(self.tree.get_children()):
+            f=self.view[self.view_top+k]; vals=self.row_values(f)
+            if self.row_cache.get(iid)!=vals:
+                self.tree.item(iid,values=vals); self.row_cache[iid]=vals
+            if f.path==self.sel_path: sel=iid
+        cur=self.tree.selection()
+        if sel is None and cur: self.tree.selection_remove(*cur)
+        elif sel is not None and cur!=(sel,): self.tree.selection_set(sel)
+        self.vsb.set(*((self.view_top/n,(self.view_top+want)/n) if n else (0.0,1.0)))
+
+    def on_scroll(self,*args):
+        if not args: return
+        if args[0]=='moveto': self.view_top=int(float(args[1])*len(self.view))
+        elif args[0]=='scroll':
+            step=int(args[1]); self.view_top+=step*self.visible_rows() if args[2]=='pages' else step
+        self.render_rows()
+
+    def on_wheel(self,e):
+        if getattr(e,'num',None)==4 or getattr(e,'delta',0)>0: self.on_scroll('scroll',-3,'units')
+        else: self.on_scroll('scroll',3,'units')
+        return 'break'
+
+    def on_select(self,_e=None):
+        # Valinta muistetaan polkuna, jotta se säilyy vierityksen ja live-lisäysten yli
+        sel=self.tree.selection()
+        if not sel: return
+        idx=self.view_top+self.tree.index(sel[0])
+        if 0<=idx<len(self.view): self.sel_path=self.view[idx].path
 
     def get_selected_path(self)->Optional[str]:
-        sel=self.tree.selection()
-        if not sel: return None
-        idx=self.tree.index(sel[0])
-        if idx<0 or idx>=len(self.filtered_indices): return None
-        return self.results[self.filtered_indices[idx]].path
+        if not self.tree.selection(): return None
+        return self.sel_path
+
+    def reveal_selected(self): self.reveal_path(self.get_selected_path())
 
-    def reveal_selected(self):
-        path=self.get_selected_path()
+    def reveal_path(self, path:Optional[str]):
         if not path: return
+        import subprocess
         try:
             if sys.platform=='darwin': subprocess.run(['open','-R',path],check=False)
             elif os.name=='nt': subprocess.run(['explorer','/select,',path],check=False)
             else:
                 folder=os.path.dirname(path); subprocess.run(['xdg-open',folder],check=False)
-        except Exception: traceback.print_exc()
+        except Exception:
+            import traceback
+            traceback.print_exc()
 
     # --- HOTFIX: Smart Clean (puuttui v5.2:ssa) ---
     def smart_clean(self):
-        # Etsii listasta 🟢 Turvallinen -luokan ja siirtää roskakoriin kynnyksen ylittävät
+        # Etsii listasta 🟢 Turvallinen -luokan ja siirtää roskakoriin kynnyksen ylittävät (taustasäikeessä, erissä)
+        if self.clean_progress is not None and not self.clean_progress.finished:
+            messagebox.showinfo('Smart Clean','Siivous on jo käynnissä.'); return
+        if self.live_q is not None:
+            # Skannaus kierrättää Top N:stä pudonneiden rivien paikat, jolloin siivoussäikeen raportoima rid voisi jo
+            # tarkoittaa toista tiedostoa
+            messagebox.showinfo('Smart Clean','Odota, että skannaus valmistuu tai pysäytä se.'); return
         try:
             thr_mb=float(self.clean_threshold_mb.get().strip() or 0)
         except ValueError:
             messagebox.showerror('Virhe','Kynnys (MB) ei ole numero.'); return
         thr_bytes=int(thr_mb*1024*1024)
-        from shutil import rmtree
-        def move_to_trash(path:str)->bool:
-            try:
-                if sys.platform=='darwin':
-                    script=f'tell application "Finder" to delete POSIX file "{path}"'
-                    subprocess.run(['osascript','-e',script],check=False)
-                    return True
-                else:
-                    try:
-                        if os.path.isdir(path): rmtree(path, ignore_errors=True)
-                        else: os.remove(path)
-                        return True
-                    except Exception:
-                        return False
-            except Exception:
-                return False
-        # Kandidaatit
-        candidates:List[str]=[]
-        for i in self.filtered_indices:
-            fi=self.results[i]
-            status,_=classify_path(fi.path)
-            if status==SAFE and fi.size>=thr_bytes:
-                candidates.append(fi.path)
+        # Kandidaatit; koot tulevat skannauksesta, ei uutta stat-kierrosta
+        st=self.store; safe=STATUS_CODES[SAFE]
+        candidates=[(rid,st.path(rid),st.size[rid]) for rid in self.view.rids() if st.status[rid]==safe and st.size[rid]>=thr_bytes]
         if not candidates:
             messagebox.showinfo('Smart Clean','Ei turvallisia siivottavia valitulla kynnyksellä.'); return
-        total=0
-        for p in candidates:
-            try: total+=os.path.getsize(p)
-            except Exception: pass
+        total=sum(c[2] for c in candidates)
         if not messagebox.askyesno('Vahvista Smart Clean', f"Siirretään Roskakoriin {len(candidates)} kohdetta, arvio {human_size(total)}.\n\nJatketaanko?"):
             return
-        errors=0
-        for p in candidates:
-            if not move_to_trash(p): errors+=1
-        if errors:
-            messagebox.showwarning('Smart Clean', f'Valmis, mutta {errors} kohdetta ei voitu siirtää.')
-        else:
-            messagebox.showinfo('Smart Clean','Valmis. Kohteet siirretty Roskakoriin.')
-        # Päivitä näkymä
-        self.results=[fi for fi in self.results if os.path.exists(fi.path)]
+        self.clean_stop.clear(); self.clean_q=queue.Queue(); self.clean_progress=CleanProgress()
+        self.clean_stop_btn.config(state=tk.NORMAL)
+        threading.Thread(target=clean_paths,args=(candidates,self.clean_stop,self.clean_progress,self.clean_q.put),daemon=True).start()
+        self.after(100,self.poll_clean)
+
+    def poll_clean(self):
+        p=self.clean_progress; finished=p.finished  # luettava ennen jonon tyhjennystä, ettei viimeinen erä jää väliin
+        changed=False
+        while True:
+            try: rids=self.clean_q.get_nowait()
+            except queue.Empty: break
+            for rid in rids:
+                # Top N voi vielä viitata riviin, joten paikkaa ei kierrätetä
+                self.view.remove(rid); self.store.remove(rid,reuse=False); changed=True
+        if changed: self.render_rows()
+        if not finished:
+            self.set_status(f"Siivotaan… {p.done}/{p.total} kohdetta, vapautettu {human_size(p.bytes_freed)} / {human_size(p.total_bytes)}")
+            self.after(100,self.poll_clean); return
+        self.clean_stop_btn.config(state=tk.DISABLED)
         self.refresh_tree_filter()
+        msg=f"Siivottu {p.deleted} kohdetta, vapautettu {human_size(p.bytes_freed)}."
+        if p.cancelled: msg+=f" Keskeytetty, {p.total-p.done} kohdetta jäi käsittelemättä."
+        self.set_status(msg)
+        if p.failed:
+            messagebox.showwarning('Smart Clean', f'Valmis, mutta {p.failed} kohdetta ei voitu siirtää.')
+        elif not p.cancelled:
+            messagebox.showinfo('Smart Clean','Valmis. Kohteet siirretty Roskakoriin.')
 
 if __name__=='__main__':
-    App().mainloop()
+    App(prescan=_PRESCAN).mainloop()